@@ -0,0 +1,142 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from engines import ENGINES, make_game
+
+# generations stepped before timing, compiling kernels and filling caches is not part of the step time
+WARMUP = 3
+
+
+def load_example(path: str, tile: int) -> np.ndarray:
+    """
+        load_example loads board from file and repeats it tile x tile times
+    """
+    board = np.load(path)
+    if tile > 1:
+        board = np.tile(board, (tile, tile))
+    return board
+
+
+def close_game(game) -> None:
+    if hasattr(game, "close"):
+        game.close()
+
+
+def measure_speed(engine: str, board: np.ndarray, generations: int, warmup: int = WARMUP) -> dict:
+    """
+        measure_speed times single steps with next() and a batch with advance(),
+        both after warmup steps which are counted into the setup time
+    """
+    start = time.perf_counter()
+    game = make_game(engine, board.copy())
+    created = time.perf_counter() - start
+    for _ in range(warmup):
+        game.next()
+    setup = time.perf_counter() - start
+
+    steps = np.empty(generations)
+    for i in range(generations):
+        start = time.perf_counter()
+        game.next()
+        steps[i] = time.perf_counter() - start
+    close_game(game)
+
+    game = make_game(engine, board.copy())
+    for _ in range(warmup):
+        game.next()
+    start = time.perf_counter()
+    game.advance(generations)
+    batch = time.perf_counter() - start
+    close_game(game)
+
+    return {
+        "create_seconds": created,
+        "setup_seconds": setup,
+        "warmup_generations": warmup,
+        "step_seconds_mean": float(steps.mean()),
+        "step_seconds_median": float(np.median(steps)),
+        "step_seconds_max": float(steps.max()),
+        "generations_per_second": generations / float(steps.sum()),
+        "advance_generations_per_second": generations / batch if batch > 0 else float("inf"),
+    }
+
+
+def measure_memory(engine: str, board: np.ndarray, generations: int) -> dict:
+    """
+        measure_memory traces peak memory allocated while creating and stepping the game
+    """
+    tracemalloc.start()
+    game = make_game(engine, board.copy())
+    for _ in range(generations):
+        game.next()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    close_game(game)
+    return {"peak_memory_bytes": peak}
+
+
+def run(examples: list, engines: list, tiles: list, generations: int, memory_generations: int,
+        warmup: int = WARMUP) -> list:
+    results = []
+    for path in examples:
+        for tile in tiles:
+            board = load_example(path, tile)
+            for engine in engines:
+                result = {
+                    "example": os.path.basename(path),
+                    "engine": engine,
+                    "tile": tile,
+                    "width": board.shape[1],
+                    "height": board.shape[0],
+                    "wire_cells": int(np.count_nonzero(board)),
+                    "generations": generations,
+                }
+                result.update(measure_speed(engine, board, generations, warmup))
+                result.update(measure_memory(engine, board, memory_generations))
+                results.append(result)
+                print("{example:32} {engine:10} {tile:3}x  {generations_per_second:12.1f} gen/s  "
+                      "{peak_memory_bytes:12d} B".format(**result), file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark WireWorld engines on example circuits")
+    parser.add_argument("examples", nargs="*", help="board files, all files in examples/ by default")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES), help="engine to measure, all by default")
+    parser.add_argument("--tile", action="append", type=int, help="repeat boards tile x tile times, 1 by default")
+    parser.add_argument("--generations", type=int, default=100, help="generations to time")
+    parser.add_argument("--warmup", type=int, default=WARMUP, help="generations stepped before timing")
+    parser.add_argument("--memory-generations", type=int, default=10, help="generations to trace memory over")
+    parser.add_argument("--output", default="-", help="file for JSON results, - for standard output")
+    args = parser.parse_args(argv)
+
+    examples = args.examples or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples", "*.npy")))
+    results = run(examples, args.engine or list(ENGINES), args.tile or [1], args.generations, args.memory_generations,
+                  args.warmup)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"WWB1"
+# magic, height, width, chunk side
+HEADER = struct.Struct("<4sIII")
+# offset of the chunk data, its length and encoding, for every chunk
+INDEX = np.dtype([("offset", "<u8"), ("length", "<u4"), ("encoding", "u1")])
+CHUNK = 256
+EXTENSION = ".wwb"
+
+# chunk encodings
+EMPTY_CHUNK = 0
+# every cell in 2 bits, 4 cells per byte
+PACKED_CHUNK = 1
+# uint16 positions of non-empty cells followed by their values packed in 2 bits
+SPARSE_CHUNK = 2
+
+
+def pack_2bit(values: np.ndarray) -> np.ndarray:
+    """
+        pack_2bit packs values 0-3 into bytes, 4 values per byte
+    """
+    values = np.asarray(values, dtype=np.uint8).ravel()
+    padded = np.zeros(-(-len(values) // 4) * 4, dtype=np.uint8)
+    padded[:len(values)] = values
+    quads = padded.reshape(-1, 4)
+    return quads[:, 0] | quads[:, 1] << 2 | quads[:, 2] << 4 | quads[:, 3] << 6
+
+
+def unpack_2bit(data: np.ndarray, count: int) -> np.ndarray:
+    """
+        unpack_2bit unpacks count values packed by pack_2bit
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    quads = (data[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+    return quads.ravel()[:count].astype(np.int8)
+
+
+def encode_chunk(chunk: np.ndarray) -> tuple:
+    """
+        encode_chunk encodes chunk in the smallest of the chunk encodings
+    :return: tuple of (encoding, bytes)
+    """
+    positions = np.flatnonzero(chunk).astype("<u2")
+    if len(positions) == 0:
+        return EMPTY_CHUNK, b""
+    packed = pack_2bit(chunk)
+    if len(positions) * 2 + -(-len(positions) // 4) + 4 < len(packed):
+        count = struct.pack("<I", len(positions))
+        return SPARSE_CHUNK, count + positions.tobytes() + pack_2bit(chunk.ravel()[positions]).tobytes()
+    return PACKED_CHUNK, packed.tobytes()
+
+
+def decode_chunk(encoding: int, data: np.ndarray, shape: tuple) -> np.ndarray:
+    """
+        decode_chunk decodes chunk data of the given encoding into array of shape
+    """
+    if encoding == EMPTY_CHUNK:
+        return np.zeros(shape, dtype=np.int8)
+    if encoding == PACKED_CHUNK:
+        return unpack_2bit(data, shape[0] * shape[1]).reshape(shape)
+    count = struct.unpack("<I", bytes(data[:4]))[0]
+    positions = np.frombuffer(bytes(data[4:4 + 2 * count]), dtype="<u2")
+    chunk = np.zeros(shape[0] * shape[1], dtype=np.int8)
+    chunk[positions] = unpack_2bit(data[4 + 2 * count:], count)
+    return chunk.reshape(shape)
+
+
+def save(filename: str, board: np.ndarray, chunk: int = CHUNK) -> None:
+    """
+        save writes board in the chunked 2-bit format
+    :param filename: file to write
+    :param board: board with values 0-3
+    :param chunk: side of the square chunks
+    """
+    height, width = board.shape
+    rows, columns = -(-height // chunk), -(-width // chunk)
+    index = np.zeros(rows * columns, dtype=INDEX)
+    offset = HEADER.size + index.nbytes
+    data = []
+    for i in range(rows):
+        for j in range(columns):
+            encoding, encoded = encode_chunk(np.asarray(board[i * chunk:(i + 1) * chunk, j * chunk:(j + 1) * chunk]))
+            index[i * columns + j] = (offset, len(encoded), encoding)
+            offset += len(encoded)
+            data.append(encoded)
+    with open(filename, "wb") as file:
+        file.write(HEADER.pack(MAGIC, height, width, chunk))
+        file.write(index.tobytes())
+        for encoded in data:
+            file.write(encoded)
+
+
+class BoardFile:
+    """
+        BoardFile reads a board saved by save lazily.
+        The file is memory mapped and only chunks overlapping a requested
+        window are decoded. It can be sliced like a 2-D numpy array.
+    """
+
+    def __init__(self, filename: str):
+        self.data = np.memmap(filename, dtype=np.uint8, mode="r")
+        magic, height, width, self.chunk = HEADER.unpack(bytes(self.data[:HEADER.size]))
+        if magic != MAGIC:
+            raise ValueError("{} is not a WireWorld board file".format(filename))
+        self.shape = (height, width)
+        self.rows, self.columns = -(-height // self.chunk), -(-width // self.chunk)
+        count = self.rows * self.columns
+        self.index = np.frombuffer(bytes(self.data[HEADER.size:HEADER.size + count * INDEX.itemsize]), dtype=INDEX)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.int8)
+
+    def chunk_populated(self, row: int, column: int) -> bool:
+        """
+            chunk_populated tells whether chunk at given chunk coordinates has any non-empty cells
+        """
+        return self.index[row * self.columns + column]["encoding"] != EMPTY_CHUNK
+
+    def read_chunk(self, row: int, column: int) -> np.ndarray:
+        """
+            read_chunk decodes single chunk at given chunk coordinates
+        """
+        offset, length, encoding = self.index[row * self.columns + column]
+        shape = (min(self.chunk, self.shape[0] - row * self.chunk), min(self.chunk, self.shape[1] - column * self.chunk))
+        return decode_chunk(encoding, self.data[offset:offset + length], shape)
+
+    def read(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """
+            read returns window of the board, decoding only the chunks it overlaps
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the window
+        :param height: height of the window
+        """
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + width, self.shape[1]), min(y + height, self.shape[0])
+        window = np.zeros((max(0, y2 - y1), max(0, x2 - x1)), dtype=np.int8)
+        for row in range(y1 // self.chunk, -(-y2 // self.chunk)):
+            for column in range(x1 // self.chunk, -(-x2 // self.chunk)):
+                if not self.chunk_populated(row, column):
+                    continue
+                cy, cx = row * self.chunk, column * self.chunk
+                chunk = self.read_chunk(row, column)
+                top, left = max(cy, y1), max(cx, x1)
+                bottom, right = min(cy + chunk.shape[0], y2), min(cx + chunk.shape[1], x2)
+                window[top - y1:bottom - y1, left - x1:right - x1] = chunk[top - cy:bottom - cy, left - cx:right - cx]
+        return window
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        rows, columns = key
+        y1, y2, _ = rows.indices(self.shape[0])
+        x1, x2, _ = columns.indices(self.shape[1])
+        return self.read(x1, y1, max(0, x2 - x1), max(0, y2 - y1))
+
+    def __array__(self, dtype=None, copy=None):
+        board = self.read(0, 0, self.shape[1], self.shape[0])
+        return board if dtype is None else board.astype(dtype)
+
+
+class GameView:
+    """
+        GameView lets a game be sliced like a 2-D numpy array, so boards of any engine
+        can be saved chunk by chunk without building the dense board at once.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        width, height = game.get_board_size()
+        self.shape = (height, width)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        rows, columns = key
+        y1, y2, _ = rows.indices(self.shape[0])
+        x1, x2, _ = columns.indices(self.shape[1])
+        return self.game.get_board(x1, y1, max(0, x2 - x1), max(0, y2 - y1))
+
+    def __array__(self, dtype=None, copy=None):
+        board = self.game.get_board(0, 0)
+        return board if dtype is None else board.astype(dtype)
+
+
+def open_board(filename: str):
+    """
+        open_board opens board file without reading all of it
+    :return: numpy.memmap for .npy files, BoardFile for board files
+    """
+    if filename.endswith(EXTENSION):
+        return BoardFile(filename)
+    return np.load(filename, mmap_mode="r")
+
+
+def load_board(filename: str) -> np.ndarray:
+    """
+        load_board reads whole board from .npy or board file
+    """
+    if filename.endswith(EXTENSION):
+        return np.asarray(BoardFile(filename))
+    return np.load(filename)
+
+
+def save_board(filename: str, board: np.ndarray) -> None:
+    """
+        save_board writes board as board file when filename ends with .wwb, as .npy otherwise
+    """
+    if os.path.splitext(filename)[1] == EXTENSION:
+        save(filename, board)
+    else:
+        np.save(filename, board)
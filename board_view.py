@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+from PyQt5 import sip
+from PyQt5.QtCore import QRect, Qt
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtWidgets import QWidget
+
+
+class BoardView(QWidget):
+    """
+        BoardView shows the visible part of the board scaled to the widget size.
+        Cells are kept in a persistent 8 bit buffer shared with a QImage, so a
+        frame only copies and repaints the rectangles that changed.
+    """
+
+    def __init__(self, color_table: list):
+        super().__init__()
+        self.color_table = color_table
+        self.buffer = np.zeros((0, 0), dtype=np.uint8)
+        self.image = None
+        # instrumentation.Instruments timing the painting, None when not measured
+        self.instruments = None
+        # text drawn over the top left corner of the board
+        self.overlay = ""
+        self.overlay_rect = QRect()
+
+    def _allocate(self, height: int, width: int) -> None:
+        # QImage scanlines have to be 32 bit aligned
+        stride = -(-width // 4) * 4
+        self.buffer = np.zeros((height, stride), dtype=np.uint8)[:, :width]
+        # the image points into the buffer memory, it is not copied
+        self.image = QImage(sip.voidptr(self.buffer.ctypes.data), width, height, stride, QImage.Format_Indexed8)
+        self.image.setColorTable(self.color_table)
+
+    def set_board(self, board: np.ndarray) -> None:
+        """
+            set_board replaces the whole shown board
+        :param board: visible part of the board
+        """
+        if self.buffer.shape != board.shape:
+            self._allocate(*board.shape)
+        self.buffer[:] = board
+        self.update()
+
+    def update_cells(self, board: np.ndarray, x: int, y: int) -> None:
+        """
+            update_cells replaces a rectangle of the shown board and repaints only that rectangle
+        :param board: new cells of the rectangle
+        :param x: horizontal position of the rectangle in the shown board
+        :param y: vertical position of the rectangle in the shown board
+        """
+        height, width = board.shape
+        self.buffer[y:y + height, x:x + width] = board
+        self.update(self.cells_to_widget(x, y, width, height))
+
+    def cells_to_widget(self, x: int, y: int, width: int, height: int) -> QRect:
+        """
+            cells_to_widget converts rectangle of cells into widget pixels, rounded outwards
+        """
+        cell_w = self.width() / max(self.buffer.shape[1], 1)
+        cell_h = self.height() / max(self.buffer.shape[0], 1)
+        left, top = math.floor(x * cell_w), math.floor(y * cell_h)
+        right, bottom = math.ceil((x + width) * cell_w), math.ceil((y + height) * cell_h)
+        return QRect(left, top, right - left, bottom - top)
+
+    def set_overlay(self, text: str) -> None:
+        """
+            set_overlay replaces the text drawn over the board, empty text removes it
+        """
+        self.update(self.overlay_rect)
+        self.overlay = text
+        self.overlay_rect = QRect()
+        if text:
+            self.overlay_rect = self.fontMetrics().boundingRect(QRect(0, 0, self.width(), self.height()),
+                                                                Qt.AlignLeft | Qt.AlignTop, text).adjusted(0, 0, 8, 8)
+            self.update(self.overlay_rect)
+
+    def paintEvent(self, event) -> None:
+        if self.instruments is None:
+            self._paint(event)
+            return
+        with self.instruments.timed("paint"):
+            self._paint(event)
+
+    def _paint(self, event) -> None:
+        if self.image is None or self.buffer.size == 0:
+            return
+        rows, columns = self.buffer.shape
+        cell_w = self.width() / columns
+        cell_h = self.height() / rows
+        # only the cells under the repainted area are drawn
+        area = event.rect()
+        x1 = max(0, math.floor(area.left() / cell_w))
+        y1 = max(0, math.floor(area.top() / cell_h))
+        x2 = min(columns, math.ceil((area.right() + 1) / cell_w))
+        y2 = min(rows, math.ceil((area.bottom() + 1) / cell_h))
+        painter = QPainter(self)
+        painter.drawImage(self.cells_to_widget(x1, y1, x2 - x1, y2 - y1), self.image, QRect(x1, y1, x2 - x1, y2 - y1))
+        if self.overlay and area.intersects(self.overlay_rect):
+            painter.fillRect(self.overlay_rect, QColor(0, 0, 0, 160))
+            painter.setPen(Qt.white)
+            painter.drawText(self.overlay_rect.adjusted(4, 4, -4, -4), Qt.AlignLeft | Qt.AlignTop, self.overlay)
+        painter.end()
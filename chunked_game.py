@@ -0,0 +1,352 @@
+import numpy as np
+
+import board_format
+import level_of_detail
+from game import Game, WireWorld, step, EMPTY, ELECTRON_HEAD, ELECTRON_TAIL
+
+CHUNK = 256
+
+
+class ChunkedWireWorld(Game):
+    """
+        ChunkedWireWorld stores the board as a dictionary of fixed-size chunks
+        keyed by chunk coordinates. Chunks without wires are not stored, so an
+        empty area takes no memory, and expanding the board in any direction only
+        moves the origin instead of copying the board.
+        Only chunks with electrons and their neighbours are stepped.
+    """
+
+    SHARED_CHECKPOINTS = True
+
+    def __init__(self, board: np.ndarray = None, chunk: int = CHUNK):
+        """
+        :param board: initial board
+        :param chunk: side of the square chunks
+        """
+        super().__init__()
+        if board is None:
+            board = WireWorld().get_board(0, 0)
+        self.chunk = chunk
+        self.compile(board)
+
+    def compile(self, board) -> None:
+        """
+            compile splits board into chunks, board can be anything sliceable like a 2-D array
+        """
+        self.height, self.width = board.shape
+        # absolute coordinates of the board cell (0, 0), chunks are keyed in absolute coordinates
+        self.ox, self.oy = 0, 0
+        self.chunks = {}
+        for y in range(0, self.height, self.chunk):
+            for x in range(0, self.width, self.chunk):
+                part = np.asarray(board[y:y + self.chunk, x:x + self.chunk])
+                if part.any():
+                    chunk = np.zeros((self.chunk, self.chunk), dtype=np.int8)
+                    chunk[:part.shape[0], :part.shape[1]] = part
+                    self.chunks[y // self.chunk, x // self.chunk] = chunk
+        self._board_changed()
+
+    def _board_changed(self) -> None:
+        # chunks containing electrons, recomputed before the next step
+        self.active = None
+        # chunks before the last step, for get_changes
+        self.previous = None
+        # reduced ranks of the chunks for get_board_reduced, by chunk key
+        self.details = {}
+
+    def _locate(self, x: int, y: int) -> tuple:
+        """
+            _locate returns the chunk key and position in the chunk of board cell x, y
+        """
+        cy, ry = divmod(y + self.oy, self.chunk)
+        cx, rx = divmod(x + self.ox, self.chunk)
+        return (cy, cx), ry, rx
+
+    def add(self, x: int, y: int) -> None:
+        """
+            Add updates board by iterating to next value of state
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        """
+        value = self.get_board(x, y, 1, 1)[0, 0]
+        self.set(x, y, (value - 1) % 4)
+
+    def set(self, x: int, y: int, v: int) -> None:
+        """
+            Set updates the board position x, y with value v
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        :param v: value to put in place
+        """
+        self._check_cells(x, y)
+        key, ry, rx = self._locate(x, y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            if v == EMPTY:
+                return
+            chunk = self.chunks[key] = np.zeros((self.chunk, self.chunk), dtype=np.int8)
+        elif not chunk.flags.writeable:
+            # the chunk is shared with a checkpoint
+            chunk = self.chunks[key] = chunk.copy()
+        chunk[ry, rx] = v
+        if v == EMPTY and not chunk.any():
+            del self.chunks[key]
+        self.active = None
+        self.previous = None
+        # the chunk was changed in place, its reduced copies are out of date
+        self.details.pop(key, None)
+
+    def set_cells(self, xs, ys, values) -> None:
+        """
+            set_cells updates many board positions at once, a later cell wins over an earlier one at the same position
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        :param values: value for every cell, or one value for all of them
+        """
+        xs, ys, values = (np.ravel(a) for a in np.broadcast_arrays(xs, ys, values))
+        self._check_cells(xs, ys)
+        cy, ry = np.divmod(ys + self.oy, self.chunk)
+        cx, rx = np.divmod(xs + self.ox, self.chunk)
+        # cells are grouped by chunk, every chunk is written once
+        keys, group = np.unique(np.stack([cy, cx], axis=1), axis=0, return_inverse=True)
+        order = np.argsort(group.ravel(), kind="stable")
+        bounds = np.searchsorted(group.ravel()[order], np.arange(len(keys) + 1))
+        for (ky, kx), start, end in zip(keys.tolist(), bounds[:-1], bounds[1:]):
+            cells = order[start:end]
+            key = (ky, kx)
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                if not values[cells].any():
+                    continue
+                chunk = self.chunks[key] = np.zeros((self.chunk, self.chunk), dtype=np.int8)
+            elif not chunk.flags.writeable:
+                chunk = self.chunks[key] = chunk.copy()
+            chunk[ry[cells], rx[cells]] = values[cells]
+            if not chunk.any():
+                del self.chunks[key]
+            self.details.pop(key, None)
+        self.active = None
+        self.previous = None
+
+    def checkpoint(self):
+        """
+            checkpoint returns the current board and generation to be given to restore later.
+            No cells are copied, the chunks become read only and are shared with the checkpoint
+            until the game writes to them, and stepping always makes new chunks.
+        """
+        for chunk in self.chunks.values():
+            chunk.flags.writeable = False
+        return dict(self.chunks), self.ox, self.oy, self.width, self.height, self.generation
+
+    def restore(self, checkpoint) -> None:
+        """
+            restore brings back the board and generation of a checkpoint, which can be restored again later
+        :param checkpoint: value returned by checkpoint
+        """
+        chunks, self.ox, self.oy, self.width, self.height, self.generation = checkpoint
+        self.chunks = dict(chunks)
+        self._board_changed()
+
+    def _find_active(self) -> set:
+        return {key for key, chunk in self.chunks.items() if _has_electrons(chunk)}
+
+    def _step_chunk(self, key: tuple) -> np.ndarray:
+        cy, cx = key
+        c = self.chunk
+        # for every neighbour direction, the part of the neighbour forming the halo and where it goes
+        halo = {-1: (slice(c - 1, c), 0), 0: (slice(0, c), 1), 1: (slice(0, 1), c + 1)}
+        padded = np.zeros((c + 2, c + 2), dtype=np.int8)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                neighbour = self.chunks.get((cy + dy, cx + dx))
+                if neighbour is None:
+                    continue
+                (ys, ty), (xs, tx) = halo[dy], halo[dx]
+                part = neighbour[ys, xs]
+                padded[ty:ty + part.shape[0], tx:tx + part.shape[1]] = part
+        return step(padded)[1:-1, 1:-1]
+
+    def next(self) -> None:
+        """
+            Next updates the game to the new state
+        """
+        if self.active is None:
+            self.active = self._find_active()
+        # electrons only reach the chunks next to the active ones
+        stepped = {
+            (cy + dy, cx + dx) for cy, cx in self.active for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+        }
+        chunks = dict(self.chunks)
+        active = set()
+        for key in stepped:
+            if key not in self.chunks:
+                continue
+            chunk = self._step_chunk(key)
+            if _has_electrons(chunk):
+                chunks[key] = chunk
+                active.add(key)
+            elif key in self.active:
+                chunks[key] = chunk
+            # a chunk without electrons before and after the step did not change, it stays shared
+
+        self.previous = self.chunks
+        self.chunks = chunks
+        self.active = active
+        self.generation += 1
+
+    def _window(self, chunks: dict, x: int, y: int, width: int, height: int, side: int = None,
+                fetch=None) -> np.ndarray:
+        """
+            _window assembles part of the board from chunks, x and y are in absolute coordinates
+        :param side: side of the arrays stored for every chunk, the chunk size by default
+        :param fetch: function returning the array of a chunk key, by default it is taken from chunks
+        """
+        board = np.zeros((height, width), dtype=np.int8)
+        if width <= 0 or height <= 0:
+            return board
+        c = side or self.chunk
+        rows = range(y // c, (y + height - 1) // c + 1)
+        columns = range(x // c, (x + width - 1) // c + 1)
+        if len(rows) * len(columns) <= len(chunks):
+            keys = [(cy, cx) for cy in rows for cx in columns if (cy, cx) in chunks]
+        else:
+            keys = [(cy, cx) for cy, cx in chunks if cy in rows and cx in columns]
+        for cy, cx in keys:
+            chunk = fetch((cy, cx)) if fetch else chunks[cy, cx]
+            top, left = max(cy * c, y), max(cx * c, x)
+            bottom, right = min((cy + 1) * c, y + height), min((cx + 1) * c, x + width)
+            board[top - y:bottom - y, left - x:right - x] = chunk[top - cy * c:bottom - cy * c,
+                                                                  left - cx * c:right - cx * c]
+        return board
+
+    def _detail(self, key: tuple, factor: int) -> np.ndarray:
+        """
+            _detail returns ranks of chunk key reduced by factor.
+            Reduced copies are kept until the chunk is replaced by a step, so quiet
+            chunks are reduced only once, and every level is built from the one below.
+        """
+        chunk = self.chunks[key]
+        entry = self.details.get(key)
+        if entry is None or entry[0] is not chunk:
+            entry = self.details[key] = (chunk, [level_of_detail.reduce_ranks(level_of_detail.ranks(chunk), 2)])
+        levels = entry[1]
+        while 2 ** len(levels) < factor:
+            levels.append(level_of_detail.reduce_ranks(levels[-1], 2))
+        return levels[factor.bit_length() - 2]
+
+    def get_board(self, x: int, y: int, width: int = -1, height: int = -1, pad: bool = False) -> np.ndarray:
+        """
+            get_board returns part of the board as numpy.ndarray
+        :param x: horizontal element of the top left element to return
+        :param y: vertical element of the top left element to return
+        :param width: width of the returned board
+        :param height: height of the returned board
+        :param pad: whether the resulting array should be padded
+        :return:
+        """
+        if width == -1:
+            width = self.width
+        if height == -1:
+            height = self.height
+        if not pad:
+            width = max(0, min(width, self.width - x))
+            height = max(0, min(height, self.height - y))
+        return self._window(self.chunks, x + self.ox, y + self.oy, width, height)
+
+    def get_changes(self, x: int, y: int, width: int, height: int):
+        """
+            get_changes returns which cells of a part of the board were changed by the last generation
+            Chunks that were not stepped are shared between generations and compare equal.
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the part
+        :param height: height of the part
+        :return: boolean numpy.ndarray of shape (height, width), None if changes are not known
+        """
+        if self.previous is None:
+            return None
+        ax, ay = x + self.ox, y + self.oy
+        return self._window(self.chunks, ax, ay, width, height) != self._window(self.previous, ax, ay, width, height)
+
+    def get_board_reduced(self, x: int, y: int, width: int, height: int, factor: int) -> np.ndarray:
+        """
+            get_board_reduced returns part of the board shrunk by factor for zoomed out viewing,
+            every factor x factor block of cells becomes its highest priority state.
+            Blocks aligned with the chunks are taken from reduced copies of the chunks,
+            so the cost depends on the size of the result rather than the number of cells.
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the part in cells
+        :param height: height of the part in cells
+        :param factor: side of the merged blocks
+        :return: numpy.ndarray of shape (ceil(height / factor), ceil(width / factor))
+        """
+        ax, ay = int(x) + self.ox, int(y) + self.oy
+        # the largest power of two up to factor and the chunk size the window is aligned to
+        aligned = min(factor & -factor, self.chunk, (ax | ay | self.chunk) & -(ax | ay | self.chunk))
+        if aligned == 1:
+            return super().get_board_reduced(x, y, width, height, factor)
+        rows, columns = -(-height // factor), -(-width // factor)
+        ranks = self._window(self.chunks, ax // aligned, ay // aligned, columns * factor // aligned,
+                             rows * factor // aligned, self.chunk // aligned, lambda key: self._detail(key, aligned))
+        if factor > aligned:
+            ranks = level_of_detail.reduce_ranks(ranks, factor // aligned)
+        return level_of_detail.ranks(ranks)
+
+    def count_cells(self) -> np.ndarray:
+        """
+            count_cells returns the number of cells in every state, indexed by the state
+        """
+        counts = np.zeros(4, dtype=np.int64)
+        for chunk in self.chunks.values():
+            counts += np.bincount(chunk.ravel().astype(np.intp), minlength=4)
+        # cells outside of the stored chunks are empty
+        counts[EMPTY] += self.width * self.height - counts.sum()
+        return counts
+
+    def expand_board(self, x1: int, x2: int, y1: int, y2: int) -> None:
+        """
+            expand_board expands the board in 4 direction, no cells are copied
+        :param x1: expansion to the left
+        :param x2: expansion to the right
+        :param y1: expansion to the top
+        :param y2: expansion to the bottom
+        """
+        self.ox -= x1
+        self.oy -= y1
+        self.width += x1 + x2
+        self.height += y1 + y2
+        self.previous = None
+
+    @staticmethod
+    def get_color_dict() -> dict:
+        return WireWorld.get_color_dict()
+
+    @staticmethod
+    def color_table() -> list:
+        return WireWorld.color_table()
+
+    @staticmethod
+    def possible_values() -> list:
+        return WireWorld.possible_values()
+
+    @staticmethod
+    def state_names() -> list:
+        return WireWorld.state_names()
+
+    def get_board_size(self) -> tuple:
+        return self.width, self.height
+
+    def load_board(self, filename: str):
+        self.compile(board_format.open_board(filename))
+
+    def save_board(self, filename: str):
+        board_format.save_board(filename, board_format.GameView(self))
+
+    def reset_board(self):
+        self.chunks = {}
+        self._board_changed()
+
+
+def _has_electrons(chunk: np.ndarray) -> bool:
+    return bool(((chunk == ELECTRON_HEAD) | (chunk == ELECTRON_TAIL)).any())
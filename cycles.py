@@ -0,0 +1,92 @@
+import numpy as np
+
+# multipliers of the splitmix64 finalizer
+MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_2 = np.uint64(0x94D049BB133111EB)
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def cell_keys(indices: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+        cell_keys returns pseudo random Zobrist keys for cells in given states
+        Keys are computed with splitmix64 from the flat cell index, so no key table has to be stored.
+        Empty cells have key 0, so they do not contribute to the hash.
+    :param indices: flat indices of the cells
+    :param values: states of the cells
+    :return: uint64 keys
+    """
+    z = (indices.astype(np.uint64) * np.uint64(4) + values.astype(np.uint64)) * GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * MIX_1
+    z = (z ^ (z >> np.uint64(27))) * MIX_2
+    z ^= z >> np.uint64(31)
+    z[values == 0] = 0
+    return z
+
+
+def board_hash(board: np.ndarray) -> int:
+    """
+        board_hash returns Zobrist hash of the whole board
+    """
+    indices = np.flatnonzero(board)
+    return int(np.bitwise_xor.reduce(cell_keys(indices, board.ravel()[indices]), initial=np.uint64(0)))
+
+
+class CycleDetector:
+    """
+        CycleDetector finds the period of a game that fell into a repeating state.
+        The board hash is updated incrementally from the changed cells only.
+        Repetition is searched for with Brent's algorithm, which keeps a single
+        saved state, and a matching hash is confirmed by comparing the boards,
+        so the detected period is exact.
+    """
+
+    def __init__(self, board: np.ndarray, generation: int):
+        self.hash = board_hash(board)
+        self.generation = generation
+        # generation at which the period was confirmed and its length
+        self.detected_at = None
+        self.period = None
+
+        self.saved_hash = self.hash
+        self.saved_board = board.copy()
+        self.power = 1
+        self.distance = 0
+
+    def update(self, old: np.ndarray, new: np.ndarray, box: tuple = None) -> None:
+        """
+            update advances the detector by one generation
+        :param old: board before the step
+        :param new: board after the step
+        :param box: (y1, y2, x1, x2) part of the board where cells may have changed
+        """
+        if box is None:
+            box = (0, new.shape[0], 0, new.shape[1])
+        y1, y2, x1, x2 = box
+        ys, xs = np.nonzero(old[y1:y2, x1:x2] != new[y1:y2, x1:x2])
+        indices = (ys + y1) * new.shape[1] + xs + x1
+        self.update_cells(indices, old.ravel()[indices], new.ravel()[indices], new)
+
+    def update_cells(self, indices: np.ndarray, old_values: np.ndarray, new_values: np.ndarray,
+                     board: np.ndarray) -> None:
+        """
+            update_cells advances the detector by one generation from the list of changed cells
+        :param indices: flat indices of the cells that changed
+        :param old_values: states of the cells before the step
+        :param new_values: states of the cells after the step
+        :param board: board after the step
+        """
+        self.generation += 1
+        changes = cell_keys(indices, old_values) ^ cell_keys(indices, new_values)
+        self.hash ^= int(np.bitwise_xor.reduce(changes, initial=np.uint64(0)))
+
+        if self.period is not None:
+            return
+        self.distance += 1
+        if self.hash == self.saved_hash and np.array_equal(board, self.saved_board):
+            self.period = self.distance
+            self.detected_at = self.generation
+        elif self.distance == self.power:
+            self.saved_hash = self.hash
+            self.saved_board = board.copy()
+            self.power *= 2
+            self.distance = 0
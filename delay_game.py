@@ -0,0 +1,415 @@
+import numpy as np
+
+import board_format
+from game import Game, WireWorld, ELECTRON_HEAD, ELECTRON_TAIL, CONDUCTOR
+from sparse_game import compile_cells
+
+# segment modes
+CELLS = 0
+DELAY = 1
+
+
+def find_segments(indptr: np.ndarray, indices: np.ndarray) -> list:
+    """
+        find_segments finds plain wire segments, chains of cells with exactly two wire neighbours
+    :param indptr: CSR neighbour table offsets
+    :param indices: CSR neighbour table
+    :return: list of (cells, start, end) where start and end are the junction cells at the ends
+             of the chain, both are -1 for closed loops
+    """
+    degree = np.diff(indptr)
+    plain = (degree == 2).tolist()
+    starts = indptr.tolist()
+    neighbours = indices.tolist()
+    visited = [False] * len(plain)
+
+    def walk(origin: int, cell: int) -> tuple:
+        previous = origin
+        chain = []
+        while plain[cell] and cell != origin:
+            visited[cell] = True
+            chain.append(cell)
+            a, b = neighbours[starts[cell]], neighbours[starts[cell] + 1]
+            previous, cell = cell, b if a == previous else a
+        return chain, cell
+
+    segments = []
+    for cell in np.flatnonzero(degree == 2).tolist():
+        if visited[cell]:
+            continue
+        visited[cell] = True
+        a, b = neighbours[starts[cell]], neighbours[starts[cell] + 1]
+        forward, end = walk(cell, a)
+        if end == cell:
+            segments.append((np.array([cell] + forward), -1, -1))
+            continue
+        backward, start = walk(cell, b)
+        segments.append((np.array(backward[::-1] + [cell] + forward), start, end))
+    return segments
+
+
+def is_train(states: np.ndarray, loop: bool) -> bool:
+    """
+        is_train checks whether a segment only holds electrons moving towards its last cell
+        Every tail has to be directly behind a head and the cell in front of a head has to be a conductor.
+    """
+    heads = states == ELECTRON_HEAD
+    tails = states == ELECTRON_TAIL
+    if loop:
+        return bool(np.array_equal(tails, np.roll(heads, -1)) and not (heads & np.roll(heads, -2)).any())
+    return bool(np.array_equal(tails[:-1], heads[1:]) and not (heads[:-1] & tails[1:]).any())
+
+
+class DelayLineWireWorld(Game):
+    """
+        DelayLineWireWorld compiles plain wires into delay lines.
+        Chains of cells with exactly two wire neighbours are found once. A chain
+        carrying electrons in one direction only is stored as a ring buffer of
+        head bits, so stepping it is a change of the ring offset plus one written
+        bit. Junctions, diodes, gates and chains with electrons moving both ways
+        are simulated cell by cell. A chain falls back to cell simulation when a
+        signal enters it from the wrong end and becomes a delay line again once it
+        is idle.
+    """
+
+    def __init__(self, board: np.ndarray = None):
+        super().__init__()
+        if board is None:
+            board = WireWorld().get_board(0, 0)
+        self.compile(board)
+
+    def compile(self, board: np.ndarray) -> None:
+        """
+            compile converts dense board into wire cells and delay lines
+        :param board: dense board to compile
+        """
+        self.height, self.width = board.shape
+        self.dtype = board.dtype
+        keys = np.flatnonzero(board)
+        self._compile(keys, board.ravel()[keys])
+
+    def _compile(self, keys: np.ndarray, state: np.ndarray) -> None:
+        self.keys = keys
+        # states of the cell simulated cells, cells of delay lines are only valid at line ends
+        self.state = state.astype(np.int8)
+        self.indptr, self.indices = compile_cells(self.keys, self.width, self.height)
+        self.time = 0
+
+        segments = find_segments(self.indptr, self.indices)
+        self.seg_cells = [cells for cells, _, _ in segments]
+        self.seg_start = np.array([start for _, start, _ in segments], dtype=np.int64)
+        self.seg_end = np.array([end for _, _, end in segments], dtype=np.int64)
+        self.seg_loop = self.seg_start == -1
+        self.seg_first = np.array([cells[0] for cells in self.seg_cells], dtype=np.int64)
+        self.seg_last = np.array([cells[-1] for cells in self.seg_cells], dtype=np.int64)
+        self.seg_length = np.array([len(cells) for cells in self.seg_cells], dtype=np.int64)
+        self.seg_mode = np.full(len(segments), CELLS, dtype=np.int8)
+        self.seg_size = self.seg_length + ~self.seg_loop
+        self.seg_base = np.concatenate([[0], np.cumsum(self.seg_size)])[:-1]
+        self.seg_offset = np.zeros(len(segments), dtype=np.int64)
+        self.ring = np.zeros(int(self.seg_size.sum()), dtype=bool)
+        # segment of every wire cell (-1 for the other cells) and the position of the cell in it
+        self.cell_segment = np.full(len(self.keys), -1, dtype=np.int64)
+        self.cell_position = np.zeros(len(self.keys), dtype=np.int64)
+        for s, cells in enumerate(self.seg_cells):
+            self.cell_segment[cells] = s
+            self.cell_position[cells] = np.arange(len(cells))
+        self.simulated = np.ones(len(self.keys), dtype=bool)
+        self.cell_segments = set(range(len(segments)))
+        for s in range(len(segments)):
+            self._to_delay(s)
+        self._rebuild()
+
+    def _set_mode(self, s: int, mode: int) -> None:
+        """changes the mode of segment s, _rebuild has to be called afterwards"""
+        self.seg_mode[s] = mode
+        self.simulated[self.seg_cells[s]] = mode == CELLS
+        if mode == CELLS:
+            self.cell_segments.add(s)
+        else:
+            self.cell_segments.discard(s)
+
+    def _to_delay(self, s: int) -> bool:
+        """turns segment s into a delay line if it holds a one way train of electrons"""
+        states = self.state[self.seg_cells[s]]
+        if not is_train(states, self.seg_loop[s]):
+            states = states[::-1]
+            if not is_train(states, self.seg_loop[s]):
+                return False
+            self._reverse(s)
+        heads = states == ELECTRON_HEAD
+        ring = self.ring[self.seg_base[s]:self.seg_base[s] + self.seg_size[s]]
+        ring[:len(states)] = heads
+        if not self.seg_loop[s]:
+            # the extra slot remembers the electron that left through the last cell
+            ring[-1] = states[-1] == ELECTRON_TAIL
+        self.seg_offset[s] = self.time
+        self._set_mode(s, DELAY)
+        return True
+
+    def _reverse(self, s: int) -> None:
+        cells = self.seg_cells[s] = self.seg_cells[s][::-1]
+        self.cell_position[cells] = np.arange(len(cells))
+        self.seg_start[s], self.seg_end[s] = self.seg_end[s], self.seg_start[s]
+        self.seg_first[s], self.seg_last[s] = self.seg_last[s], self.seg_first[s]
+
+    def _cell_states(self, cells: np.ndarray) -> np.ndarray:
+        """states of wire cells given by their indices, cells of delay lines are read from the rings"""
+        states = self.state[cells]
+        segments = self.cell_segment[cells]
+        delay = segments >= 0
+        delay[delay] = self.seg_mode[segments[delay]] == DELAY
+        segments = segments[delay]
+        size = self.seg_size[segments]
+        base = self.seg_base[segments]
+        positions = self.cell_position[cells[delay]] - (self.time - self.seg_offset[segments])
+        head = self.ring[base + positions % size]
+        tail = self.ring[base + (positions + 1) % size]
+        states[delay] = np.where(head, ELECTRON_HEAD, np.where(tail, ELECTRON_TAIL, CONDUCTOR))
+        return states
+
+    def _to_cells(self, s: int) -> None:
+        self.state[self.seg_cells[s]] = self._cell_states(self.seg_cells[s])
+        self._set_mode(s, CELLS)
+
+    def _rebuild(self) -> None:
+        """rebuilds the arrays used for stepping after segments changed their mode"""
+        self.active = np.flatnonzero(self.simulated)
+        starts = self.indptr[self.active]
+        counts = self.indptr[self.active + 1] - starts
+        self.active_indptr = np.concatenate([[0], np.cumsum(counts)])
+        offsets = np.arange(self.active_indptr[-1]) - np.repeat(self.active_indptr[:-1] - starts, counts)
+        self.active_indices = self.indices[offsets]
+
+        # the open delay lines, their per segment values are gathered instead of collected one by one
+        lines = self.lines = np.flatnonzero((self.seg_mode == DELAY) & ~self.seg_loop)
+        self.line_first = self.seg_first[lines]
+        self.line_last = self.seg_last[lines]
+        self.line_length = self.seg_length[lines]
+        self.line_size = self.seg_size[lines]
+        self.line_base = self.seg_base[lines]
+        self.line_offset = self.seg_offset[lines]
+        self.line_start = self.seg_start[lines]
+        self.line_end = self.seg_end[lines]
+
+    def _line_cell_states(self, position: np.ndarray) -> np.ndarray:
+        """states of the cells at given positions of all open delay lines"""
+        shift = self.time - self.line_offset
+        head = self.ring[self.line_base + (position - shift) % self.line_size]
+        tail = self.ring[self.line_base + (position + 1 - shift) % self.line_size]
+        return np.where(head, ELECTRON_HEAD, np.where(tail, ELECTRON_TAIL, CONDUCTOR)).astype(np.int8)
+
+    def _line_inputs(self) -> np.ndarray:
+        """
+            _line_inputs refreshes the states of delay line ends and finds electrons entering the lines
+        :return: boolean array, whether a head enters the first cell of every open delay line
+        """
+        while True:
+            first = self._line_cell_states(np.zeros_like(self.line_length))
+            last = self._line_cell_states(self.line_length - 1)
+            self.state[self.line_first] = first
+            self.state[self.line_last] = last
+            inputs = (self.state[self.line_start] == ELECTRON_HEAD) & (first == CONDUCTOR)
+            backwards = (self.state[self.line_end] == ELECTRON_HEAD) & (last == CONDUCTOR)
+            if not backwards.any():
+                return inputs
+            for k in np.flatnonzero(backwards).tolist():
+                s = int(self.lines[k])
+                idle = not self.ring[self.seg_base[s]:self.seg_base[s] + self.seg_size[s]].any()
+                if idle and not inputs[k]:
+                    # nothing travels in the line yet, it can simply carry signals the other way
+                    self._reverse(s)
+                else:
+                    self._to_cells(s)
+            self._rebuild()
+
+    def checkpoint(self):
+        """
+            checkpoint returns the current board and generation to be given to restore later,
+            the states of the wire cells are copied
+        """
+        return self.keys, self._materialize(), self.width, self.height, self.generation
+
+    def restore(self, checkpoint) -> None:
+        """
+            restore brings back the board and generation of a checkpoint, which can be restored again later,
+            the wires are analysed again
+        :param checkpoint: value returned by checkpoint
+        """
+        keys, state, self.width, self.height, self.generation = checkpoint
+        self._compile(keys, state)
+
+    def add(self, x: int, y: int) -> None:
+        """
+            Add updates board by iterating to next value of state
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        """
+        value = self.get_board(x, y, 1, 1)[0, 0]
+        self.set(x, y, (value - 1) % 4)
+
+    def set(self, x: int, y: int, v: int) -> None:
+        """
+            Set updates the board position x, y with value v
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        :param v: value to put in place
+        """
+        self._check_cells(x, y)
+        key = y * self.width + x
+        position = np.searchsorted(self.keys, key)
+        if v != 0 and position < len(self.keys) and self.keys[position] == key:
+            # wires stay the same, only the segment of the cell is simulated cell by cell
+            s = self.cell_segment[position]
+            if s >= 0 and self.seg_mode[s] == DELAY:
+                self._to_cells(s)
+                self._rebuild()
+            self.state[position] = v
+            return
+        keys, state = self.keys, self._materialize()
+        if position < len(keys) and keys[position] == key:
+            keys, state = np.delete(keys, position), np.delete(state, position)
+        if v != 0:
+            keys, state = np.insert(keys, position, key), np.insert(state, position, v)
+        # wires are analysed again, the board is edited rarely compared to stepping
+        self._compile(keys, state)
+
+    def set_cells(self, xs, ys, values) -> None:
+        """
+            set_cells updates many board positions at once, a later cell wins over an earlier one at the same position.
+            The wires are analysed once for all the cells.
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        :param values: value for every cell, or one value for all of them
+        """
+        xs, ys, values = (np.ravel(a) for a in np.broadcast_arrays(xs, ys, values))
+        self._check_cells(xs, ys)
+        edited, last = np.unique((ys * self.width + xs)[::-1], return_index=True)
+        values = values[::-1][last]
+        keys, state = self.keys, self._materialize()
+        kept = ~np.isin(keys, edited)
+        placed = values != 0
+        keys = np.concatenate([keys[kept], edited[placed]])
+        order = np.argsort(keys, kind="stable")
+        state = np.concatenate([state[kept], values[placed].astype(state.dtype)])
+        self._compile(keys[order], state[order])
+
+    def next(self) -> None:
+        """
+            Next updates the game to the new state
+        """
+        inputs = self._line_inputs()
+
+        # cell level simulation of junctions and of segments that are not delay lines
+        heads = self.state[self.active_indices] == ELECTRON_HEAD
+        prefix = np.concatenate([[0], np.cumsum(heads, dtype=np.int32)])
+        counts = prefix[self.active_indptr[1:]] - prefix[self.active_indptr[:-1]]
+        current = self.state[self.active]
+        new_state = np.full_like(current, CONDUCTOR)
+        new_state[(current == CONDUCTOR) & (counts >= 1) & (counts <= 2)] = ELECTRON_HEAD
+        new_state[current == ELECTRON_HEAD] = ELECTRON_TAIL
+        self.state[self.active] = new_state
+
+        # delay lines move by advancing time, only the entering electron is written
+        self.time += 1
+        shift = self.time - self.line_offset
+        self.ring[self.line_base + (-shift) % self.line_size] = inputs
+
+        promoted = False
+        for s in list(self.cell_segments):
+            if (self.state[self.seg_cells[s]] == CONDUCTOR).all():
+                promoted |= self._to_delay(s)
+        if promoted:
+            self._rebuild()
+        self.generation += 1
+
+    def _materialize(self) -> np.ndarray:
+        """returns states of all wire cells"""
+        return self._cell_states(np.arange(len(self.keys)))
+
+    def get_board(self, x: int, y: int, width: int = -1, height: int = -1, pad: bool = False) -> np.ndarray:
+        """
+            get_board returns part of the board as numpy.ndarray
+        :param x: horizontal element of the top left element to return
+        :param y: vertical element of the top left element to return
+        :param width: width of the returned board
+        :param height: height of the returned board
+        :param pad: whether the resulting array should be padded
+        :return:
+        """
+        if width == -1:
+            width = self.width
+        if height == -1:
+            height = self.height
+        if not pad:
+            width = max(0, min(width, self.width - x))
+            height = max(0, min(height, self.height - y))
+        board = np.zeros((height, width), dtype=self.dtype)
+
+        # keys are sorted row by row, only the cells in the rows of the window are read
+        first_row, last_row = max(y, 0), min(y + height, self.height)
+        if first_row >= last_row:
+            return board
+        lo, hi = np.searchsorted(self.keys, [first_row * self.width, last_row * self.width])
+        ys, xs = np.divmod(self.keys[lo:hi], self.width)
+        inside = np.flatnonzero((xs >= x) & (xs < x + width))
+        board[ys[inside] - y, xs[inside] - x] = self._cell_states(lo + inside)
+        return board
+
+    def probe_states(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+            probe_states returns the states of the cells at given coordinates
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        """
+        states = np.zeros(len(xs), dtype=np.int8)
+        if len(self.keys) == 0:
+            return states
+        # cells outside of the board are empty, their keys would wrap into the next row
+        keys = np.where(self._inside(xs, ys), ys * self.width + xs, -1)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[positions] == keys
+        states[found] = self._cell_states(positions[found])
+        return states
+
+    def expand_board(self, x1: int, x2: int, y1: int, y2: int) -> None:
+        """
+            expand_board expands the board in 4 direction
+        :param x1: expansion to the left
+        :param x2: expansion to the right
+        :param y1: expansion to the top
+        :param y2: expansion to the bottom
+        """
+        ys, xs = np.divmod(self.keys, self.width)
+        self.width += x1 + x2
+        self.height += y1 + y2
+        # shifting keeps the row-major order of cells, so the compiled wires stay valid
+        self.keys = (ys + y1) * self.width + xs + x1
+
+    @staticmethod
+    def get_color_dict() -> dict:
+        return WireWorld.get_color_dict()
+
+    @staticmethod
+    def color_table() -> list:
+        return WireWorld.color_table()
+
+    @staticmethod
+    def possible_values() -> list:
+        return WireWorld.possible_values()
+
+    @staticmethod
+    def state_names() -> list:
+        return WireWorld.state_names()
+
+    def get_board_size(self) -> tuple:
+        return self.width, self.height
+
+    def load_board(self, filename: str):
+        self.compile(board_format.load_board(filename))
+
+    def save_board(self, filename: str):
+        board_format.save_board(filename, board_format.GameView(self))
+
+    def reset_board(self):
+        self._compile(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8))
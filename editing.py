@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def transform(board: np.ndarray, turns: int = 0, flip: bool = False) -> np.ndarray:
+    """
+        transform rotates and mirrors a part of the board before pasting it
+    :param board: cells to transform
+    :param turns: number of quarter turns clockwise
+    :param flip: whether the cells are mirrored left to right before turning
+    :return: transformed cells
+    """
+    if flip:
+        board = board[:, ::-1]
+    return np.rot90(board, -turns)
+
+
+def line_cells(x1: int, y1: int, x2: int, y2: int) -> tuple:
+    """
+        line_cells returns the cells of a line between two cells, both ends included.
+        Neighbouring cells of the line touch at least diagonally, so a drawn line conducts.
+    :return: (xs, ys) arrays of cell coordinates
+    """
+    length = max(abs(x2 - x1), abs(y2 - y1))
+    steps = np.arange(length + 1)
+    if length == 0:
+        return np.array([x1]), np.array([y1])
+    xs = x1 + np.round(steps * (x2 - x1) / length).astype(np.intp)
+    ys = y1 + np.round(steps * (y2 - y1) / length).astype(np.intp)
+    return xs, ys
+
+
+def rect_cells(x: int, y: int, width: int, height: int) -> tuple:
+    """
+        rect_cells returns the cells of a filled rectangle
+    :return: (xs, ys) arrays of cell coordinates
+    """
+    ys, xs = np.mgrid[y:y + height, x:x + width]
+    return xs.ravel(), ys.ravel()
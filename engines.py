@@ -0,0 +1,39 @@
+from chunked_game import ChunkedWireWorld
+from delay_game import DelayLineWireWorld
+from frontier_game import FrontierWireWorld
+from game import WireWorld
+from hashlife_game import HashLifeWireWorld
+from packed_game import PackedWireWorld
+from rule_game import RuleGame
+from sparse_game import SparseWireWorld
+from tiled_game import TiledWireWorld
+
+
+def _jit(board=None):
+    # numba is imported only when the engine is used, importing it slows down the start of every tool
+    from jit_game import JitWireWorld
+    return JitWireWorld(board)
+
+
+# factories of the simulation engines by name, all of them take the initial board as the first argument
+ENGINES = {
+    "wireworld": WireWorld,
+    "sparse": SparseWireWorld,
+    "frontier": FrontierWireWorld,
+    "packed": PackedWireWorld,
+    "tiled": TiledWireWorld,
+    "hashlife": HashLifeWireWorld,
+    "delay": DelayLineWireWorld,
+    "chunked": ChunkedWireWorld,
+    "table": RuleGame,
+    "jit": _jit,
+}
+
+
+def make_game(engine: str, board=None):
+    """
+        make_game creates game of the given engine
+    :param engine: name of the engine from ENGINES
+    :param board: initial board
+    """
+    return ENGINES[engine](board)
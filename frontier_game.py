@@ -0,0 +1,101 @@
+import numpy as np
+
+import neighbourhood
+from game import WireWorld, ELECTRON_HEAD, ELECTRON_TAIL, CONDUCTOR
+
+
+class FrontierWireWorld(WireWorld):
+    """
+        FrontierWireWorld steps the board incrementally.
+        It keeps coordinates of the current electron heads and tails and only
+        evaluates conductors adjacent to the heads, so the cost of a step is
+        proportional to the signal activity instead of the size of the circuit.
+    """
+
+    def __init__(self, board: np.ndarray = None):
+        super().__init__(board)
+        self.heads = None
+        self.tails = None
+        # (tails, heads, new heads) coordinates changed by the last step
+        self.changed = None
+
+    def _find_frontier(self) -> None:
+        self.heads = np.nonzero(self.board == ELECTRON_HEAD)
+        self.tails = np.nonzero(self.board == ELECTRON_TAIL)
+
+    def _board_changed(self) -> None:
+        super()._board_changed()
+        self.heads = None
+        self.tails = None
+        self.changed = None
+
+    def _cells_changed(self, y1: int, y2: int, x1: int, x2: int) -> None:
+        super()._cells_changed(y1, y2, x1, x2)
+        self.heads = None
+        self.tails = None
+        self.changed = None
+
+    def _prepare_step(self) -> None:
+        if self.heads is None:
+            self._find_frontier()
+        self._prepare_cycles()
+
+    def _step(self) -> None:
+        """
+            _step moves the game one generation forward, updating the board in place
+        """
+        height, width = self.board.shape
+        head_ys, head_xs = self.heads
+
+        # conductors next to heads, listed once for every head they touch
+        keys = []
+        for dy, dx in neighbourhood.MOORE_OFFSETS:
+            ys, xs = head_ys + dy, head_xs + dx
+            inside = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+            ys, xs = ys[inside], xs[inside]
+            conductors = self.board[ys, xs] == CONDUCTOR
+            keys.append(ys[conductors] * width + xs[conductors])
+        keys, counts = np.unique(np.concatenate(keys), return_counts=True)
+        new_heads = np.divmod(keys[counts <= 2], width)
+
+        # tail -> conductor, head -> tail, conductor -> head
+        self.board[self.tails] = CONDUCTOR
+        self.board[self.heads] = ELECTRON_TAIL
+        self.board[new_heads] = ELECTRON_HEAD
+        self.changed = (self.tails, self.heads, new_heads)
+        self.tails = self.heads
+        self.heads = new_heads
+        self.generation += 1
+
+    def get_changes(self, x: int, y: int, width: int, height: int):
+        """
+            get_changes returns which cells of a part of the board were changed by the last generation
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the part
+        :param height: height of the part
+        :return: boolean numpy.ndarray of shape (height, width), None if changes are not known
+        """
+        if self.changed is None or self.heads is None:
+            return None
+        changes = np.zeros((height, width), dtype=bool)
+        # the frontier is kept in coordinates of the stored board
+        x, y = x - self.ox, y - self.oy
+        for ys, xs in self.changed:
+            inside = (ys >= y) & (ys < y + height) & (xs >= x) & (xs < x + width)
+            changes[ys[inside] - y, xs[inside] - x] = True
+        return changes
+
+    def _stepped(self) -> None:
+        """
+            _stepped is called after every generation, the board is updated in place so changes come from the frontier
+        """
+        if self.cycles is not None:
+            width = self.board.shape[1]
+            indices = [ys * width + xs for ys, xs in self.changed]
+            old_values = [np.full(len(keys), value, dtype=np.int8) for keys, value in
+                          zip(indices, (ELECTRON_TAIL, ELECTRON_HEAD, CONDUCTOR))]
+            new_values = [np.full(len(keys), value, dtype=np.int8) for keys, value in
+                          zip(indices, (CONDUCTOR, ELECTRON_TAIL, ELECTRON_HEAD))]
+            self.cycles.update_cells(np.concatenate(indices), np.concatenate(old_values),
+                                     np.concatenate(new_values), self.board)
@@ -1,13 +1,23 @@
 import numpy as np
 
+import board_format
+import cycles
+import editing
+import level_of_detail
 import neighbourhood
 
 
 class Game:
     """Game is a class implementing the operation of the cellular automata"""
 
+    # whether checkpoints share the unchanged parts of the board instead of copying it,
+    # only then a checkpoint is cheap enough to be saved before every generation
+    SHARED_CHECKPOINTS = False
+
     def __init__(self):
-        pass
+        self.generation = 0
+        self.probes = None
+        self.instruments = None
 
     def add(self, x: int, y: int) -> None:
         """
@@ -26,12 +36,153 @@ class Game:
         """
         pass
 
+    def _check_cells(self, xs, ys) -> None:
+        """
+            _check_cells raises IndexError when any of the cells is outside of the board
+        """
+        width, height = self.get_board_size()
+        if np.size(xs) and (np.min(xs) < 0 or np.min(ys) < 0 or np.max(xs) >= width or np.max(ys) >= height):
+            raise IndexError("cells are outside of the board")
+
+    def _inside(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+            _inside returns which of the cells are on the board
+        """
+        width, height = self.get_board_size()
+        return (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+
+    def set_cells(self, xs, ys, values) -> None:
+        """
+            set_cells updates many board positions at once, a later cell wins over an earlier one at the same position
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        :param values: value for every cell, or one value for all of them
+        """
+        xs, ys, values = np.broadcast_arrays(xs, ys, values)
+        self._check_cells(xs, ys)
+        for x, y, v in zip(xs.ravel().tolist(), ys.ravel().tolist(), values.ravel().tolist()):
+            self.set(x, y, v)
+
+    def paste(self, board: np.ndarray, x: int, y: int, transparent: bool = False) -> None:
+        """
+            paste copies a part of a board into the board, use editing.transform to rotate or flip it first
+        :param board: cells to paste
+        :param x: horizontal coordinate of the top left pasted cell
+        :param y: vertical coordinate of the top left pasted cell
+        :param transparent: whether empty cells of the pasted part keep the cells below them
+        """
+        board = np.asarray(board)
+        if transparent:
+            ys, xs = np.nonzero(board)
+        else:
+            ys, xs = np.indices(board.shape).reshape(2, -1)
+        self.set_cells(xs + x, ys + y, board[ys, xs])
+
+    def fill_rect(self, x: int, y: int, width: int, height: int, v: int) -> None:
+        """
+            fill_rect sets every cell of a rectangle to value v
+        :param x: horizontal coordinate of the top left cell
+        :param y: vertical coordinate of the top left cell
+        :param width: width of the rectangle
+        :param height: height of the rectangle
+        :param v: value to put in place
+        """
+        self.set_cells(*editing.rect_cells(x, y, width, height), v)
+
+    def draw_line(self, x1: int, y1: int, x2: int, y2: int, v: int) -> None:
+        """
+            draw_line sets the cells of a line between two cells to value v, both ends included
+        :param v: value to put in place
+        """
+        self.set_cells(*editing.line_cells(x1, y1, x2, y2), v)
+
+    def checkpoint(self):
+        """
+            checkpoint returns the current board and generation to be given to restore later
+        """
+        raise NotImplementedError("{} does not support checkpoints".format(type(self).__name__))
+
+    def restore(self, checkpoint) -> None:
+        """
+            restore brings back the board and generation of a checkpoint, which can be restored again later
+        :param checkpoint: value returned by checkpoint
+        """
+        raise NotImplementedError("{} does not support checkpoints".format(type(self).__name__))
+
     def next(self) -> None:
         """
             Next updates the game to the new state
         """
         pass
 
+    def advance(self, n: int, every: int = 0) -> list:
+        """
+            advance updates the game by n generations
+        :param n: number of generations to advance
+        :param every: if set, a copy of every k-th generation is returned
+        :return: list of (generation, board) tuples of the kept generations
+        """
+        kept = []
+        for _ in range(n):
+            self.next()
+            self._sample_probes()
+            if every and self.generation % every == 0:
+                kept.append((self.generation, self.get_board(0, 0).copy()))
+        return kept
+
+    def run_until(self, predicate, limit: int = -1) -> int:
+        """
+            run_until updates the game until predicate(game) returns True
+        :param predicate: function called with the game after every generation
+        :param limit: maximal number of generations to run, -1 for no limit
+        :return: number of generations advanced
+        """
+        steps = 0
+        while steps != limit:
+            self.next()
+            self._sample_probes()
+            steps += 1
+            if predicate(self):
+                break
+        return steps
+
+    def attach_probes(self, probes) -> None:
+        """
+            attach_probes makes advance and run_until sample the probes after every generation
+        :param probes: probes.ProbeTrace, None to detach; the current generation is sampled at once
+        """
+        self.probes = probes
+        self._sample_probes()
+
+    def _sample_probes(self) -> None:
+        if self.probes is not None:
+            self.probes.sample(self)
+
+    def attach_instruments(self, instruments) -> None:
+        """
+            attach_instruments starts timing the game methods, without instruments they run untouched
+        :param instruments: instrumentation.Instruments, None to detach
+        """
+        if self.instruments is not None:
+            self.instruments.detach(self)
+        self.instruments = instruments
+        if instruments is not None:
+            instruments.attach(self)
+
+    def count_cells(self) -> np.ndarray:
+        """
+            count_cells returns the number of cells in every state, indexed by the state
+        """
+        return np.bincount(np.asarray(self.get_board(0, 0)).ravel().astype(np.intp), minlength=4)[:4]
+
+    def probe_states(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+            probe_states returns the states of the cells at given coordinates, cells outside of the board are empty
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        """
+        return np.array([self.get_board(x, y, 1, 1, pad=True)[0, 0] for x, y in zip(xs, ys)], dtype=np.int8)
+
     def get_board(self, x: int, y: int, width: int = -1, height: int = -1, pad: bool = False) -> np.ndarray:
         """
             get_board returns part of the board as numpy.ndarray
@@ -44,6 +195,32 @@ class Game:
         """
         pass
 
+    def get_changes(self, x: int, y: int, width: int, height: int):
+        """
+            get_changes returns which cells of a part of the board were changed by the last generation
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the part
+        :param height: height of the part
+        :return: boolean numpy.ndarray of shape (height, width), None if changes are not known
+        """
+        return None
+
+    def get_board_reduced(self, x: int, y: int, width: int, height: int, factor: int) -> np.ndarray:
+        """
+            get_board_reduced returns part of the board shrunk by factor for zoomed out viewing,
+            every factor x factor block of cells becomes its highest priority state
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the part in cells
+        :param height: height of the part in cells
+        :param factor: side of the merged blocks
+        :return: numpy.ndarray of shape (ceil(height / factor), ceil(width / factor))
+        """
+        rows, columns = -(-height // factor), -(-width // factor)
+        board = self.get_board(x, y, columns * factor, rows * factor, pad=True)
+        return level_of_detail.reduce_board(np.asarray(board), factor)
+
     def expand_board(self, x1: int, x2: int, y1: int, y2: int) -> None:
         """
             expand_board expands the board in 4 direction
@@ -66,6 +243,13 @@ class Game:
     def possible_values() -> list:
         pass
 
+    @staticmethod
+    def state_names() -> list:
+        """
+            state_names returns short names of all states indexed by the state, state 0 is the empty one
+        """
+        pass
+
     def get_board_size(self) -> tuple:
         pass
 
@@ -85,15 +269,160 @@ ELECTRON_TAIL = 2
 CONDUCTOR = 3
 
 
+def step(board: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+        step computes the next WireWorld generation of the whole board at once
+    :param board: board in the current state
+    :param out: optional array of the same shape to write the new state into
+    :return: new board in the next state
+    """
+    # New board for new state
+    if out is None:
+        new_board = np.zeros_like(board)
+    else:
+        new_board = out
+        new_board.fill(EMPTY)
+
+    # conductor -> head if one or two neighbours are electrons, else -> conductor
+    heads = board == ELECTRON_HEAD
+    counts = neighbourhood.moore_count(heads)
+    conductors = board == CONDUCTOR
+    new_board[conductors] = CONDUCTOR
+    new_board[conductors & (counts >= 1) & (counts <= 2)] = ELECTRON_HEAD
+    # head -> tail
+    new_board[heads] = ELECTRON_TAIL
+    # tail -> conductor
+    new_board[board == ELECTRON_TAIL] = CONDUCTOR
+    return new_board
+
+
+def bounding_box(board: np.ndarray) -> tuple:
+    """
+        bounding_box returns the (y1, y2, x1, x2) bounds of the non-empty cells of board, (0, 0, 0, 0) for an empty board
+    """
+    rows = np.flatnonzero(np.any(board, axis=1))
+    if len(rows) == 0:
+        return 0, 0, 0, 0
+    columns = np.flatnonzero(np.any(board, axis=0))
+    return int(rows[0]), int(rows[-1]) + 1, int(columns[0]), int(columns[-1]) + 1
+
+
 class WireWorld(Game):
+    """
+        WireWorld keeps only the part of the board containing wires in memory.
+        The stored board is cropped to the non-empty cells and placed at an origin in the
+        board, the empty margins around it are not stored, stepped or saved, while the
+        size of the board stays as it was given or expanded.
+    """
+
     def __init__(self, board: np.ndarray = None):
-        super(Game).__init__()
+        super().__init__()
         if board is None:
-            self.board = np.array(
+            board = np.array(
                 [[0, 0, 0, 0, 0, 0, 0], [0, 0, 1, 2, 3, 0, 0], [0, 3, 0, 0, 0, 3, 0], [0, 0, 3, 3, 3, 0, 0],
                  [0, 0, 0, 0, 0, 0, 0]], dtype=np.int8)
-        else:
-            self.board = board
+        self.detect_cycles = False
+        self.compile(board)
+
+    def compile(self, board: np.ndarray) -> None:
+        """
+            compile stores board cropped to its non-empty cells
+        """
+        self.height, self.width = board.shape
+        y1, y2, x1, x2 = bounding_box(board)
+        # position of the stored board in the board
+        self.ox, self.oy = x1, y1
+        self.board = np.array(board[y1:y2, x1:x2])
+        self._board_changed()
+
+    def _board_changed(self) -> None:
+        """
+            _board_changed drops the cached stepping state after the board was edited or replaced
+        """
+        # second buffer for stepping, empty outside of the wire box
+        self.spare = None
+        # (y1, y2, x1, x2) bounds of the non-empty cells in the stored board, wiring does not change while stepping
+        self.wire_box = None
+        self.cycles = None
+
+    def _cells_changed(self, y1: int, y2: int, x1: int, x2: int) -> None:
+        """
+            _cells_changed is called after cells were set, the wire box grows to include the new wires
+        :param y1: top of the set non-empty cells in the stored board
+        :param y2: bottom of the set non-empty cells, exclusive
+        :param x1: left of the set non-empty cells
+        :param x2: right of the set non-empty cells, exclusive
+        """
+        if self.wire_box is not None and y1 < y2:
+            by1, by2, bx1, bx2 = self.wire_box
+            if by1 == by2:
+                self.wire_box = (y1, y2, x1, x2)
+            else:
+                self.wire_box = (min(by1, y1), max(by2, y2), min(bx1, x1), max(bx2, x2))
+        self.cycles = None
+
+    def _include(self, y1: int, y2: int, x1: int, x2: int) -> None:
+        """
+            _include grows the stored board to cover a rectangle of the board.
+            Some room is left around it, so drawing outwards does not copy the board on every cell.
+        """
+        height, width = self.board.shape
+        sy1, sx1 = self.oy, self.ox
+        sy2, sx2 = sy1 + height, sx1 + width
+        if self.board.size == 0:
+            sy1, sy2, sx1, sx2 = y1, y2, x1, x2
+        elif y1 >= sy1 and y2 <= sy2 and x1 >= sx1 and x2 <= sx2:
+            return
+        ny1, ny2, nx1, nx2 = min(sy1, y1), max(sy2, y2), min(sx1, x1), max(sx2, x2)
+        room_y, room_x = (ny2 - ny1) // 2, (nx2 - nx1) // 2
+        if ny1 < sy1:
+            ny1 = max(0, ny1 - room_y)
+        if ny2 > sy2:
+            ny2 = min(self.height, ny2 + room_y)
+        if nx1 < sx1:
+            nx1 = max(0, nx1 - room_x)
+        if nx2 > sx2:
+            nx2 = min(self.width, nx2 + room_x)
+        board = np.zeros((ny2 - ny1, nx2 - nx1), dtype=self.board.dtype)
+        if self.board.size:
+            board[self.oy - ny1:self.oy - ny1 + height, self.ox - nx1:self.ox - nx1 + width] = self.board
+        if self.wire_box is not None:
+            by1, by2, bx1, bx2 = self.wire_box
+            dy, dx = self.oy - ny1, self.ox - nx1
+            self.wire_box = (by1 + dy, by2 + dy, bx1 + dx, bx2 + dx)
+        self.board = board
+        self.ox, self.oy = nx1, ny1
+        self.spare = None
+        self.cycles = None
+
+    def crop(self) -> None:
+        """
+            crop shrinks the stored board to the non-empty cells, after wires were erased
+        """
+        y1, y2, x1, x2 = bounding_box(self.board)
+        if (y2 - y1, x2 - x1) == self.board.shape:
+            return
+        self.board = self.board[y1:y2, x1:x2].copy()
+        self.ox += x1
+        self.oy += y1
+        self._board_changed()
+
+    def track_cycles(self, enabled: bool = True) -> None:
+        """
+            track_cycles turns on hashing of every generation to find periodic states.
+            Once the period is known, advance skips whole periods without simulating them.
+        :param enabled: whether cycles should be tracked
+        """
+        self.detect_cycles = enabled
+        self.cycles = None
+
+    def period(self):
+        """
+            period returns the length of the detected cycle or None if no cycle was found yet
+        """
+        if self.cycles is None:
+            return None
+        return self.cycles.period
 
     def add(self, x: int, y: int) -> None:
         """
@@ -101,7 +430,7 @@ class WireWorld(Game):
         :param x: horizontal coordinate of the board
         :param y: vertical coordinate of the board
         """
-        self.board[y, x] = (self.board[x, y] - 1) % 4
+        self.set(x, y, (self.get_board(x, y, 1, 1, pad=True)[0, 0] - 1) % 4)
 
     def set(self, x: int, y: int, v: int) -> None:
         """
@@ -110,30 +439,155 @@ class WireWorld(Game):
         :param y: vertical coordinate of the board
         :param v: value to put in place
         """
-        self.board[y, x] = v
+        self._check_cells(x, y)
+        if v != EMPTY:
+            self._include(y, y + 1, x, x + 1)
+        elif not (0 <= y - self.oy < self.board.shape[0] and 0 <= x - self.ox < self.board.shape[1]):
+            return
+        sy, sx = y - self.oy, x - self.ox
+        self.board[sy, sx] = v
+        if v != EMPTY:
+            self._cells_changed(sy, sy + 1, sx, sx + 1)
+        else:
+            self._cells_changed(0, 0, 0, 0)
+
+    def set_cells(self, xs, ys, values) -> None:
+        """
+            set_cells updates many board positions at once, a later cell wins over an earlier one at the same position
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        :param values: value for every cell, or one value for all of them
+        """
+        xs, ys, values = (np.ravel(a) for a in np.broadcast_arrays(xs, ys, values))
+        if len(xs) == 0:
+            return
+        self._check_cells(xs, ys)
+        wires = values != EMPTY
+        if wires.any():
+            self._include(ys[wires].min(), ys[wires].max() + 1, xs[wires].min(), xs[wires].max() + 1)
+        rows, columns = ys - self.oy, xs - self.ox
+        # empty cells outside of the stored board are empty already
+        stored = (rows >= 0) & (rows < self.board.shape[0]) & (columns >= 0) & (columns < self.board.shape[1])
+        self.board[rows[stored], columns[stored]] = values[stored]
+        if wires.any():
+            self._cells_changed(rows[wires].min(), rows[wires].max() + 1, columns[wires].min(), columns[wires].max() + 1)
+        else:
+            self._cells_changed(0, 0, 0, 0)
+
+    def checkpoint(self):
+        """
+            checkpoint returns the current board and generation to be given to restore later, the board is copied
+        """
+        return self.board.copy(), self.ox, self.oy, self.width, self.height, self.generation
+
+    def restore(self, checkpoint) -> None:
+        """
+            restore brings back the board and generation of a checkpoint, which can be restored again later
+        :param checkpoint: value returned by checkpoint
+        """
+        board, self.ox, self.oy, self.width, self.height, self.generation = checkpoint
+        self.board = board.copy()
+        self._board_changed()
+
+    def _probes_cover_period(self) -> bool:
+        """
+            _probes_cover_period tells whether probe events of skipped periods can be copied from the last period
+        """
+        return self.probes is None or self.probes.covers_period(self.period())
+
+    def probe_states(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+            probe_states returns the states of the cells at given coordinates
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        """
+        ys, xs = np.asarray(ys) - self.oy, np.asarray(xs) - self.ox
+        height, width = self.board.shape
+        stored = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+        states = np.zeros(ys.shape, dtype=self.board.dtype)
+        states[stored] = self.board[ys[stored], xs[stored]]
+        return states
+
+    def _prepare_step(self) -> None:
+        if self.wire_box is None:
+            self.wire_box = bounding_box(self.board)
+        if self.spare is None or self.spare.shape != self.board.shape or self.spare.dtype != self.board.dtype:
+            self.spare = np.zeros_like(self.board)
+        self._prepare_cycles()
+
+    def _prepare_cycles(self) -> None:
+        if self.detect_cycles and self.cycles is None:
+            self.cycles = cycles.CycleDetector(self.board, self.generation)
+
+    def _stepped(self) -> None:
+        """
+            _stepped is called after every generation with the previous board in spare
+        """
+        if self.cycles is not None:
+            self.cycles.update(self.spare, self.board, self.wire_box)
+
+    def _step(self) -> None:
+        """
+            _step moves the game one generation forward using the preallocated spare buffer
+        """
+        y1, y2, x1, x2 = self.wire_box
+        step(self.board[y1:y2, x1:x2], out=self.spare[y1:y2, x1:x2])
+        self.board, self.spare = self.spare, self.board
+        self.generation += 1
 
     def next(self):
         """
             Next updates the game to the new state
         """
-        # New board for new state
-        new_board = np.zeros_like(self.board)
-
-        # conductor -> head if on or two neighbours are electrons, else -> conductor
-        conductors = np.where(self.board == CONDUCTOR)
-        for i in range(len(conductors[0])):
-            y, x = conductors[0][i], conductors[1][i]
-            # iteration over all conductors
-            neighbours = neighbourhood.moore_hard(self.board, x, y)
-            if np.count_nonzero(neighbours == ELECTRON_HEAD) in [1, 2]:
-                new_board[y, x] = ELECTRON_HEAD
-            else:
-                new_board[y, x] = CONDUCTOR
-        # head -> tail
-        new_board[self.board == ELECTRON_HEAD] = ELECTRON_TAIL
-        # tail -> conductor
-        new_board[self.board == ELECTRON_TAIL] = CONDUCTOR
-        self.board = new_board
+        self.advance(1)
+
+    def advance(self, n: int, every: int = 0) -> list:
+        """
+            advance updates the game by n generations
+            Two buffers are reused for all the generations and only the part of the
+            board containing wires is stepped. When cycles are tracked and every is not
+            set, whole periods are skipped once the period is known.
+        :param n: number of generations to advance
+        :param every: if set, a copy of every k-th generation is returned
+        :return: list of (generation, board) tuples of the kept generations
+        """
+        self._prepare_step()
+        kept = []
+        done = 0
+        while done < n:
+            self._step()
+            self._stepped()
+            self._sample_probes()
+            done += 1
+            if every and self.generation % every == 0:
+                kept.append((self.generation, self.get_board(0, 0).copy()))
+            elif not every and self.period() is not None and self._probes_cover_period():
+                # the state repeats, whole periods can be skipped
+                skipped = (n - done) // self.period() * self.period()
+                if self.probes is not None:
+                    self.probes.repeat(self.period(), skipped // self.period())
+                self.generation += skipped
+                self.cycles.generation += skipped
+                done += skipped
+        return kept
+
+    def run_until(self, predicate, limit: int = -1) -> int:
+        """
+            run_until updates the game until predicate(game) returns True
+        :param predicate: function called with the game after every generation
+        :param limit: maximal number of generations to run, -1 for no limit
+        :return: number of generations advanced
+        """
+        self._prepare_step()
+        steps = 0
+        while steps != limit:
+            self._step()
+            self._stepped()
+            self._sample_probes()
+            steps += 1
+            if predicate(self):
+                break
+        return steps
 
     def get_board(self, x: int, y: int, width: int = -1, height: int = -1, pad: bool = False) -> np.ndarray:
         """
@@ -146,24 +600,66 @@ class WireWorld(Game):
         :return:
         """
         if width == -1:
-            width = self.board.shape[1]
+            width = self.width
         if height == -1:
-            height = self.board.shape[0]
-        board = self.board[y:y + height, x:x + width]
-        if pad:
-            h, w = board.shape
-            board = np.pad(board, ((0, max(0, height - h)), (0, width - w)))
+            height = self.height
+        if not pad:
+            width = max(0, min(width, self.width - x))
+            height = max(0, min(height, self.height - y))
+        sy, sx = y - self.oy, x - self.ox
+        stored_height, stored_width = self.board.shape
+        if sy >= 0 and sx >= 0 and sy + height <= stored_height and sx + width <= stored_width:
+            return self.board[sy:sy + height, sx:sx + width]
+        # the part reaches into the empty margins which are not stored
+        board = np.zeros((height, width), dtype=self.board.dtype)
+        top, left = max(sy, 0), max(sx, 0)
+        bottom, right = min(sy + height, stored_height), min(sx + width, stored_width)
+        if top < bottom and left < right:
+            board[top - sy:bottom - sy, left - sx:right - sx] = self.board[top:bottom, left:right]
         return board
 
+    def get_changes(self, x: int, y: int, width: int, height: int):
+        """
+            get_changes returns which cells of a part of the board were changed by the last generation
+            After a step the spare buffer holds the previous generation.
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the part
+        :param height: height of the part
+        :return: boolean numpy.ndarray of shape (height, width), None if changes are not known
+        """
+        if self.spare is None or self.spare.shape != self.board.shape:
+            return None
+        changes = np.zeros((height, width), dtype=bool)
+        sy, sx = y - self.oy, x - self.ox
+        top, left = max(sy, 0), max(sx, 0)
+        bottom, right = min(sy + height, self.board.shape[0]), min(sx + width, self.board.shape[1])
+        if top < bottom and left < right:
+            changes[top - sy:bottom - sy, left - sx:right - sx] = (self.board[top:bottom, left:right]
+                                                                   != self.spare[top:bottom, left:right])
+        return changes
+
+    def count_cells(self) -> np.ndarray:
+        """
+            count_cells returns the number of cells in every state, indexed by the state
+        """
+        counts = np.bincount(self.board.ravel().astype(np.intp), minlength=4)[:4]
+        # cells outside of the stored board are empty
+        counts[EMPTY] += self.width * self.height - self.board.size
+        return counts
+
     def expand_board(self, x1: int, x2: int, y1: int, y2: int) -> None:
         """
-            expand_board expands the board in 4 direction
+            expand_board expands the board in 4 direction, only the margins grow and no cells are copied
         :param x1: expansion to the left
         :param x2: expansion to the right
         :param y1: expansion to the top
         :param y2: expansion to the bottom
         """
-        self.board = np.pad(self.board, ((y1, y2), (x1, x2)))
+        self.ox += x1
+        self.oy += y1
+        self.width += x1 + x2
+        self.height += y1 + y2
 
     @staticmethod
     def get_color_dict() -> dict:
@@ -187,19 +683,24 @@ class WireWorld(Game):
             ("Electron Tail", ELECTRON_TAIL),
         ]
 
+    @staticmethod
+    def state_names() -> list:
+        return ["empty", "head", "tail", "conductor"]
+
     def get_board_size(self) -> tuple:
-        height, width = self.board.shape
-        return width, height
+        return self.width, self.height
 
     def load_board(self, filename: str):
-        board = np.load(filename)
-        self.board = board
+        self.compile(board_format.load_board(filename))
 
     def save_board(self, filename: str):
-        np.save(filename, self.board)
+        self.crop()
+        board_format.save_board(filename, board_format.GameView(self))
 
     def reset_board(self):
-        self.board.fill(0)
+        self.board = np.zeros((0, 0), dtype=self.board.dtype)
+        self.ox, self.oy = 0, 0
+        self._board_changed()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,25 @@
+import contextlib
+import threading
+import time
+
+import numpy as np
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QImage, QPixmap, qRgb
-from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QComboBox, QHBoxLayout, QSpinBox, QPushButton, QMessageBox
+from PyQt5.QtGui import qRgb, QKeySequence
+from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QComboBox, QHBoxLayout, QSpinBox, QPushButton, QMessageBox, \
+    QShortcut
 
+import board_view
 import extend_board
+import history
 import position_widget
+import simulation
 from game import Game
 
+# maximal rate at which the board is repainted while playing
+DISPLAY_FPS = 60
+# seconds between refreshes of the instrumentation overlay
+OVERLAY_INTERVAL = 0.5
+
 
 def make_tool_selector(game: Game):
     possible_values = game.possible_values()
@@ -42,32 +56,67 @@ def make_labeled_spinbox(label_name, slot, min_value, max_value, initial_value):
 
 
 def make_help_information():
-    content = QLabel("Left click to place cell\nRight click to empty cell")
+    content = QLabel("Left click or drag to place cells\nRight click or drag to empty cells")
     content.setAlignment(Qt.AlignCenter)
     return content
 
 
+def changed_rectangles(changes: np.ndarray) -> list:
+    """
+        changed_rectangles covers changed cells with rectangles, one for every run of changed rows
+    :param changes: boolean mask of changed cells
+    :return: list of (x, y, width, height) rectangles
+    """
+    rows = changes.any(axis=1)
+    # starts and ends of the runs of rows with changes
+    edges = np.flatnonzero(np.diff(np.concatenate([[False], rows, [False]]).astype(np.int8)))
+    rectangles = []
+    for y1, y2 in zip(edges[::2], edges[1::2]):
+        columns = np.flatnonzero(changes[y1:y2].any(axis=0))
+        rectangles.append((columns[0], y1, columns[-1] + 1 - columns[0], y2 - y1))
+    return rectangles
+
+
 class GameBoardUI(QWidget):
     def __init__(self, game: Game):
         super().__init__()
         self.state = "paused"
         self.game = game
+        # the game is advanced by the simulation thread while playing
+        self.game_lock = threading.RLock()
+        self.simulation = None
         self.xpos = 0
         self.ypos = 0
         self.width = 40
         self.height = 40
 
         self.color_table = [qRgb(*t) for t in self.game.color_table()]
-
-        self.image_display = QLabel()
-        self.image_display.setAlignment(Qt.AlignCenter)
-        self.image_display.setScaledContents(True)
+        # view position, size and generation currently shown
+        self.shown_view = None
+        self.shown_generation = None
+        # instrumentation.Instruments measuring the game and the display, None when not measured
+        self.instruments = None
+        self.overlay_time = 0.0
+
+        self.image_display = board_view.BoardView(self.color_table)
         self.image_display.setMinimumSize(600, 600)
         self.image_display.mousePressEvent = self.image_press_event
+        self.image_display.mouseMoveEvent = self.image_move_event
+        self.image_display.mouseReleaseEvent = self.image_release_event
+        # (x, y, value) of the last cell drawn while a mouse button is held
+        self.drawing = None
 
         # EDIT UI
         self.reset_button = QPushButton("  Reset Board  ")
         self.reset_button.clicked.connect(self.reset_board)
+        # checkpoints saved before every edit and generation
+        self.history = history.History(game)
+        self.undo_button = QPushButton("Undo")
+        self.undo_button.clicked.connect(self.undo)
+        self.redo_button = QPushButton("Redo")
+        self.redo_button.clicked.connect(self.redo)
+        QShortcut(QKeySequence.Undo, self, self.undo)
+        QShortcut(QKeySequence.Redo, self, self.redo)
         self.tool_selector, tool_layout = make_tool_selector(self.game)
         help_information = make_help_information()
 
@@ -88,6 +137,8 @@ class GameBoardUI(QWidget):
         edit_layout.addStretch()
         edit_layout.addWidget(help_information)
         edit_layout.addStretch()
+        edit_layout.addWidget(self.undo_button)
+        edit_layout.addWidget(self.redo_button)
         edit_layout.addWidget(self.reset_button)
 
         edit_widget.setFixedWidth(600)
@@ -104,16 +155,96 @@ class GameBoardUI(QWidget):
         self.ensure_game_size()
         self.update_board()
 
-    def update_board(self):
-        board = self.game.get_board(self.xpos, self.ypos, self.width, self.height, pad=True)
+    def detail_factor(self) -> int:
+        """
+            detail_factor returns how many cells in each direction are shown as one image pixel,
+            a power of two that keeps the image no larger than the widget
+        """
+        size = self.image_display.size()
+        factor = 1
+        while self.width > factor * max(size.width(), 1) or self.height > factor * max(size.height(), 1):
+            factor *= 2
+        return factor
+
+    def set_instruments(self, instruments) -> None:
+        """
+            set_instruments starts measuring the game and the display and shows the results
+            over the board, None stops it
+        """
+        with self.game_lock:
+            self.game.attach_instruments(instruments)
+        self.instruments = instruments
+        self.image_display.instruments = instruments
+        self.overlay_time = 0.0
+        if instruments is None:
+            self.image_display.set_overlay("")
+        else:
+            self.update_overlay()
+
+    def update_overlay(self) -> None:
+        with self.game_lock:
+            self.instruments.count_cells(self.game)
+        self.image_display.set_overlay(self.instruments.overlay_text())
+        self.overlay_time = time.perf_counter()
 
-        image = QImage(board.data, board.shape[1], board.shape[0], board.strides[0], QImage.Format_Indexed8)
-        image.setColorTable(self.color_table)
-        pixmap = QPixmap(image)
-        self.image_display.setPixmap(pixmap.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.FastTransformation))
+    def _timed(self, stage: str):
+        if self.instruments is None:
+            return contextlib.nullcontext()
+        return self.instruments.timed(stage)
+
+    def update_board(self):
+        with self._timed("update_board"):
+            self._update_board()
+        if self.instruments is not None:
+            self.instruments.frame(self.shown_generation)
+            if time.perf_counter() - self.overlay_time > OVERLAY_INTERVAL:
+                self.update_overlay()
+
+    def _update_board(self):
+        factor = self.detail_factor()
+        view = (self.xpos, self.ypos, self.width, self.height, factor)
+        with self.game_lock:
+            generation = self.game.generation
+            if view == self.shown_view and generation == self.shown_generation:
+                return
+            changes = None
+            board = None
+            if factor == 1 and view == self.shown_view and generation == self.shown_generation + 1:
+                changes = self.game.get_changes(*view[:4])
+            if factor > 1:
+                # zoomed out, the game merges the cells instead of the image being scaled down
+                board = np.array(self.game.get_board_reduced(self.xpos, self.ypos, self.width, self.height, factor))
+            elif changes is None:
+                board = np.array(self.game.get_board(self.xpos, self.ypos, self.width, self.height, pad=True))
+            else:
+                rectangles = [
+                    (x, y, np.array(self.game.get_board(self.xpos + x, self.ypos + y, width, height, pad=True)))
+                    for x, y, width, height in changed_rectangles(changes)
+                ]
+
+        with self._timed("image"):
+            if board is not None and view == self.shown_view:
+                # several generations passed, compare with what is shown
+                rectangles = [
+                    (x, y, board[y:y + height, x:x + width])
+                    for x, y, width, height in changed_rectangles(board != self.image_display.buffer)
+                ]
+            elif board is not None:
+                rectangles = []
+                self.image_display.set_board(board)
+            for x, y, cells in rectangles:
+                self.image_display.update_cells(cells, x, y)
+        self.shown_view = view
+        self.shown_generation = generation
+
+    def redraw_board(self):
+        self.shown_view = None
+        self.update_board()
 
     def next_frame(self):
-        self.game.next()
+        with self.game_lock:
+            self.history.save_generation()
+            self.game.next()
         self.update_board()
 
     def play(self, time_delimiter: int):
@@ -124,39 +255,82 @@ class GameBoardUI(QWidget):
 
     def _play(self, time_delimeter: int):
         self.state = "playing"
+        rate = 1000 / time_delimeter if time_delimeter > 0 else 0
+        self.simulation = simulation.SimulationThread(self.game, self.game_lock, rate, self.history)
+        self.simulation.start()
+        # the display samples the latest generation, at most DISPLAY_FPS times a second
         self.timer = QTimer()
-        self.timer.timeout.connect(self.next_frame)
-        self.timer.start(time_delimeter)
+        self.timer.timeout.connect(self.update_board)
+        self.timer.start(max(time_delimeter, 1000 // DISPLAY_FPS))
 
     def _pause(self):
         self.state = "paused"
         self.timer.stop()
+        self.simulation.stop()
+        self.simulation = None
+        self.update_board()
 
-    def image_press_event(self, event):
-        x = event.pos().x()
-        y = event.pos().y()
+    def set_speed(self, time_delimiter: int):
+        if self.state == "playing":
+            self.simulation.set_rate(1000 / time_delimiter if time_delimiter > 0 else 0)
+            self.timer.setInterval(max(time_delimiter, 1000 // DISPLAY_FPS))
 
+    def event_cell(self, event) -> tuple:
+        """
+            event_cell returns the board cell under the mouse, kept inside of the view
+        """
         size = self.image_display.size()
         pixels_per_point_w = size.width() / self.width
         pixels_per_point_h = size.height() / self.height
 
-        board_x = int(x // pixels_per_point_w + self.xpos)
-        board_y = int(y // pixels_per_point_h + self.ypos)
+        board_x = int(event.pos().x() // pixels_per_point_w)
+        board_y = int(event.pos().y() // pixels_per_point_h)
+        return min(max(board_x, 0), self.width - 1) + self.xpos, min(max(board_y, 0), self.height - 1) + self.ypos
+
+    def image_press_event(self, event):
+        board_x, board_y = self.event_cell(event)
 
         if event.button() == Qt.RightButton:
             tool_value = 0
         else:
             tool_value = self.tool_selector.currentData(Qt.UserRole)
 
-        self.game.set(board_x, board_y, tool_value)
-        self.update_board()
+        # dragging with a button held draws a line from the last cell, the whole line is undone at once
+        with self.game_lock:
+            self.history.save()
+        self.drawing = (board_x, board_y, tool_value)
+        self.draw_line(board_x, board_y, board_x, board_y, tool_value)
+
+    def image_move_event(self, event):
+        if self.drawing is None:
+            return
+        x, y, tool_value = self.drawing
+        board_x, board_y = self.event_cell(event)
+        if (board_x, board_y) != (x, y):
+            self.drawing = (board_x, board_y, tool_value)
+            self.draw_line(x, y, board_x, board_y, tool_value)
+
+    def image_release_event(self, event):
+        self.drawing = None
+
+    def draw_line(self, x1: int, y1: int, x2: int, y2: int, tool_value: int):
+        left, top = min(x1, x2), min(y1, y2)
+        width, height = abs(x2 - x1) + 1, abs(y2 - y1) + 1
+        with self.game_lock:
+            self.game.draw_line(x1, y1, x2, y2, tool_value)
+            cells = np.array(self.game.get_board(left, top, width, height, pad=True))
+        if self.shown_view is not None and self.shown_view[4] > 1:
+            self.redraw_board()
+            return
+        self.image_display.update_cells(cells, left - self.xpos, top - self.ypos)
 
     def ensure_game_size(self):
         w, h = self.game.get_board_size()
         extend_h = max(self.height - h + self.ypos, 0)
         extend_w = max(self.width - w + self.xpos, 0)
         if extend_w > 0 or extend_h > 0:
-            self.game.expand_board(0, extend_w, 0, extend_h)
+            with self.game_lock:
+                self.game.expand_board(0, extend_w, 0, extend_h)
             self.update_position_spinbox_ranges()
         self.pas.update_board_size(self.board_width(), self.board_height())
 
@@ -190,9 +364,6 @@ class GameBoardUI(QWidget):
         _, height = self.game.get_board_size()
         return height
 
-    def resizeEvent(self, a0) -> None:
-        self.update_board()
-
     def update_position_spinbox_ranges(self):
         self.pas.xpos_spinbox.setRange(0, self.board_width() - self.width)
         self.pas.ypos_spinbox.setRange(0, self.board_height() - self.height)
@@ -204,14 +375,26 @@ class GameBoardUI(QWidget):
         self.ypos = y
 
     def load_game_file(self, filepath: str):
-        self.game.load_board(filepath)
+        with self.game_lock:
+            self.history.save()
+            try:
+                self.game.load_board(filepath)
+            except ValueError as error:
+                # nothing was loaded, so there is nothing to undo
+                self.history.undo_stack.pop()
+                QMessageBox.warning(self, "Load", str(error))
+                return
         self.update_position(0, 0)
         self.ensure_game_size()
-        self.update_board()
+        self.redraw_board()
         self.update_position_spinbox_ranges()
 
     def save_game_file(self, filepath: str):
-        self.game.save_board(filepath)
+        with self.game_lock:
+            try:
+                self.game.save_board(filepath)
+            except ValueError as error:
+                QMessageBox.warning(self, "Save", str(error))
 
     def open_extend_board_dialog(self):
         dialog = extend_board.Dialog()
@@ -222,14 +405,39 @@ class GameBoardUI(QWidget):
     def reset_board(self):
         qm = QMessageBox.question(self, "Reset", "Are You sure?", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if qm == QMessageBox.Yes:
-            self.game.reset_board()
-            self.update_board()
+            with self.game_lock:
+                self.history.save()
+                self.game.reset_board()
+            self.redraw_board()
 
     def extend_board_slot(self, x1: int, x2: int, y1: int, y2: int):
         print(x1, x2, y1, y2)
-        self.game.expand_board(x1, x2, y1, y2)
+        with self.game_lock:
+            self.history.save()
+            self.game.expand_board(x1, x2, y1, y2)
         print(self.xpos + x1, self.ypos+y1)
         self.update_position_spinbox_ranges()
         self.update_position(self.xpos+x1, self.ypos+y1)
         self.pas.update_board_size(self.board_width(), self.board_height())
-        self.update_board()
+        self.redraw_board()
+
+    def undo(self):
+        with self.game_lock:
+            restored = self.history.undo()
+        if restored:
+            self.board_restored()
+
+    def redo(self):
+        with self.game_lock:
+            restored = self.history.redo()
+        if restored:
+            self.board_restored()
+
+    def board_restored(self):
+        # the board may have been smaller before it was extended
+        self.xpos = max(0, min(self.xpos, self.board_width() - self.width))
+        self.ypos = max(0, min(self.ypos, self.board_height() - self.height))
+        self.ensure_game_size()
+        self.update_position_spinbox_ranges()
+        self.update_position(self.xpos, self.ypos)
+        self.redraw_board()
@@ -0,0 +1,414 @@
+import numpy as np
+
+import board_format
+from game import Game, WireWorld, EMPTY, ELECTRON_HEAD, ELECTRON_TAIL, CONDUCTOR
+
+# nodes up to this level keep a cached dense copy of their cells
+DENSE_LEVEL = 4
+# the node table and memoized results are rebuilt when it grows beyond this size
+MAX_NODES = 2_000_000
+# parts of the loaded board up to this level are read at once
+READ_LEVEL = 8
+
+
+class Node:
+    """
+        Node is a square of 2^level x 2^level cells made of four child nodes.
+        Nodes are hash-consed, so equal squares are the same object and results
+        computed for one of them are reused for all of them.
+    """
+    __slots__ = ("level", "nw", "ne", "sw", "se", "state", "populated", "results", "dense")
+
+    def __init__(self, level: int, nw=None, ne=None, sw=None, se=None, state: int = EMPTY):
+        self.level = level
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.state = state
+        if level == 0:
+            self.populated = state != EMPTY
+        else:
+            self.populated = nw.populated or ne.populated or sw.populated or se.populated
+        # generations step j -> centre of the node after 2^j generations
+        self.results = {}
+        self.dense = None
+
+
+def next_state(state: int, heads: int) -> int:
+    if state == ELECTRON_HEAD:
+        return ELECTRON_TAIL
+    if state == ELECTRON_TAIL:
+        return CONDUCTOR
+    if state == CONDUCTOR and 1 <= heads <= 2:
+        return ELECTRON_HEAD
+    return state
+
+
+class HashLifeWireWorld(Game):
+    """
+        HashLifeWireWorld represents the board as a hash-consed quadtree and
+        memoizes future states of every node (the Hashlife algorithm).
+        Regular circuits compress to few distinct nodes, and jumps of 2^j
+        generations reuse results computed for equal parts of the board.
+        Cells outside the board are empty, and empty cells never change, so the
+        unbounded quadtree gives the same results as the finite board.
+    """
+
+    # nodes are never changed, a checkpoint is just the root
+    SHARED_CHECKPOINTS = True
+
+    def __init__(self, board: np.ndarray = None):
+        super().__init__()
+        if board is None:
+            board = WireWorld().get_board(0, 0)
+        self._build_board(board)
+
+    def _reset_table(self) -> None:
+        # nodes of older tables are not found by _join, checkpoints remember the table of their root
+        self.table = getattr(self, "table", 0) + 1
+        self.nodes = {}
+        self.blocks = {}
+        self.leaves = [Node(0, state=state) for state in range(4)]
+        self.empty = [self.leaves[EMPTY]]
+
+    def _join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        key = (nw, ne, sw, se)
+        node = self.nodes.get(key)
+        if node is None:
+            node = Node(nw.level + 1, nw, ne, sw, se)
+            self.nodes[key] = node
+        return node
+
+    def _empty(self, level: int) -> Node:
+        while len(self.empty) <= level:
+            e = self.empty[-1]
+            self.empty.append(self._join(e, e, e, e))
+        return self.empty[level]
+
+    def _build(self, board: np.ndarray, level: int) -> Node:
+        """builds node from a dense square board of side 2^level"""
+        if not board.any():
+            return self._empty(level)
+        if level == 0:
+            return self.leaves[int(board[0, 0])]
+        if level <= DENSE_LEVEL:
+            # small blocks repeat a lot in circuits, look them up by content
+            key = board.tobytes()
+            node = self.blocks.get(key)
+            if node is None:
+                half = 1 << (level - 1)
+                node = self._join(self._build(board[:half, :half], level - 1), self._build(board[:half, half:], level - 1),
+                                  self._build(board[half:, :half], level - 1), self._build(board[half:, half:], level - 1))
+                self.blocks[key] = node
+            return node
+        half = 1 << (level - 1)
+        return self._join(self._build(board[:half, :half], level - 1), self._build(board[:half, half:], level - 1),
+                          self._build(board[half:, :half], level - 1), self._build(board[half:, half:], level - 1))
+
+    def _build_part(self, board, x: int, y: int, level: int) -> Node:
+        """
+            _build_part builds node of side 2^level from the part of board with top left corner x, y.
+            Board is only sliced, parts outside of it or without wires become empty nodes without
+            being read, and only parts up to READ_LEVEL on the edge of the board are padded.
+        """
+        height, width = board.shape
+        side = 1 << level
+        if x >= width or y >= height:
+            return self._empty(level)
+        chunk = getattr(board, "chunk", 0)
+        if chunk and side >= chunk and hasattr(board, "chunk_populated"):
+            # board files know which of their chunks are empty
+            rows = range(y // chunk, -(-min(y + side, height) // chunk))
+            columns = range(x // chunk, -(-min(x + side, width) // chunk))
+            if not any(board.chunk_populated(row, column) for row in rows for column in columns):
+                return self._empty(level)
+        if level <= READ_LEVEL:
+            part = np.asarray(board[y:y + side, x:x + side])
+            if part.shape != (side, side):
+                part = np.pad(part, ((0, side - part.shape[0]), (0, side - part.shape[1])))
+            return self._build(part.astype(np.int8, copy=False), level)
+        half = side >> 1
+        return self._join(self._build_part(board, x, y, level - 1), self._build_part(board, x + half, y, level - 1),
+                          self._build_part(board, x, y + half, level - 1),
+                          self._build_part(board, x + half, y + half, level - 1))
+
+    def _build_board(self, board) -> None:
+        """
+            _build_board builds the quadtree from anything sliceable like a 2-D array, including
+            memory mapped arrays and board files, without making a dense copy of the board
+        """
+        self._reset_table()
+        self.height, self.width = board.shape
+        # position of the board's top left corner inside the root node
+        self.ox, self.oy = 0, 0
+        level = max(3, int(np.ceil(np.log2(max(self.width, self.height, 1)))))
+        self.root = self._build_part(board, 0, 0, level)
+
+    def _expand(self, node: Node) -> Node:
+        """returns node one level up with node in its centre"""
+        e = self._empty(node.level - 1)
+        return self._join(self._join(e, e, e, node.nw), self._join(e, e, node.ne, e),
+                          self._join(e, node.sw, e, e), self._join(node.se, e, e, e))
+
+    def _grow_root(self) -> None:
+        self.root = self._expand(self.root)
+        half = 1 << (self.root.level - 2)
+        self.ox += half
+        self.oy += half
+
+    def _centre(self, node: Node) -> Node:
+        return self._join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _horizontal(self, w: Node, e: Node) -> Node:
+        return self._join(w.ne, e.nw, w.se, e.sw)
+
+    def _vertical(self, n: Node, s: Node) -> Node:
+        return self._join(n.sw, n.se, s.nw, s.ne)
+
+    def _base(self, node: Node) -> Node:
+        """centre of a 4x4 node after one generation"""
+        grid = [
+            [node.nw.nw.state, node.nw.ne.state, node.ne.nw.state, node.ne.ne.state],
+            [node.nw.sw.state, node.nw.se.state, node.ne.sw.state, node.ne.se.state],
+            [node.sw.nw.state, node.sw.ne.state, node.se.nw.state, node.se.ne.state],
+            [node.sw.sw.state, node.sw.se.state, node.se.sw.state, node.se.se.state],
+        ]
+        centre = []
+        for y in (1, 2):
+            for x in (1, 2):
+                heads = sum(grid[y + dy][x + dx] == ELECTRON_HEAD for dy in (-1, 0, 1) for dx in (-1, 0, 1))
+                centre.append(self.leaves[next_state(grid[y][x], heads)])
+        return self._join(*centre)
+
+    def _successor(self, node: Node, j: int) -> Node:
+        """
+            _successor returns the centre of node after 2^j generations, j <= node.level - 2
+        """
+        result = node.results.get(j)
+        if result is not None:
+            return result
+        level = node.level
+        if not node.populated:
+            result = self._empty(level - 1)
+        elif level == 2:
+            result = self._base(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            parts = [
+                nw, self._horizontal(nw, ne), ne,
+                self._vertical(nw, sw), self._centre(node), self._vertical(ne, se),
+                sw, self._horizontal(sw, se), se,
+            ]
+            if j == level - 2:
+                # two rounds of half steps
+                parts = [self._successor(part, level - 3) for part in parts]
+            else:
+                parts = [self._centre(part) for part in parts]
+            quarters = [
+                self._join(parts[0], parts[1], parts[3], parts[4]), self._join(parts[1], parts[2], parts[4], parts[5]),
+                self._join(parts[3], parts[4], parts[6], parts[7]), self._join(parts[4], parts[5], parts[7], parts[8]),
+            ]
+            result = self._join(*[self._successor(quarter, min(j, level - 3)) for quarter in quarters])
+        node.results[j] = result
+        return result
+
+    def _collect_garbage(self) -> None:
+        """rebuilds the node table with only the nodes reachable from the root"""
+        if len(self.nodes) <= MAX_NODES:
+            return
+        old_root = self.root
+        self._reset_table()
+        self.root = self._intern(old_root)
+
+    def _intern(self, root: Node) -> Node:
+        """returns the node equal to root built from the nodes of the current table"""
+        copies = {}
+
+        def copy(node: Node) -> Node:
+            if node.level == 0:
+                return self.leaves[node.state]
+            if not node.populated:
+                return self._empty(node.level)
+            new = copies.get(node)
+            if new is None:
+                new = self._join(copy(node.nw), copy(node.ne), copy(node.sw), copy(node.se))
+                copies[node] = new
+            return new
+
+        return copy(root)
+
+    def checkpoint(self):
+        """
+            checkpoint returns the current board and generation to be given to restore later, nothing is copied
+        """
+        return self.root, self.table, self.ox, self.oy, self.width, self.height, self.generation
+
+    def restore(self, checkpoint) -> None:
+        """
+            restore brings back the board and generation of a checkpoint, which can be restored again later
+        :param checkpoint: value returned by checkpoint
+        """
+        root, table, self.ox, self.oy, self.width, self.height, self.generation = checkpoint
+        self.root = root if table == self.table else self._intern(root)
+
+    def add(self, x: int, y: int) -> None:
+        """
+            Add updates board by iterating to next value of state
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        """
+        value = self.get_board(x, y, 1, 1)[0, 0]
+        self.set(x, y, (value - 1) % 4)
+
+    def set(self, x: int, y: int, v: int) -> None:
+        """
+            Set updates the board position x, y with value v
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        :param v: value to put in place
+        """
+        self._check_cells(x, y)
+
+        def replace(node: Node, x: int, y: int) -> Node:
+            if node.level == 0:
+                return self.leaves[v]
+            half = 1 << (node.level - 1)
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            if y < half and x < half:
+                nw = replace(nw, x, y)
+            elif y < half:
+                ne = replace(ne, x - half, y)
+            elif x < half:
+                sw = replace(sw, x, y - half)
+            else:
+                se = replace(se, x - half, y - half)
+            return self._join(nw, ne, sw, se)
+
+        self.root = replace(self.root, x + self.ox, y + self.oy)
+
+    def next(self) -> None:
+        """
+            Next updates the game to the new state
+        """
+        self._jump(1)
+
+    def _jump(self, n: int) -> None:
+        """
+            _jump moves the game n generations forward,
+            n is split into powers of two, each of them is a single memoized jump.
+        """
+        j = 0
+        while n >> j:
+            if (n >> j) & 1:
+                while self.root.level - 1 < j:
+                    self._grow_root()
+                # the centre of the expanded root is exactly the area of the root
+                self.root = self._successor(self._expand(self.root), j)
+            j += 1
+        self.generation += n
+        self._collect_garbage()
+
+    def advance(self, n: int, every: int = 0) -> list:
+        """
+            advance updates the game by n generations
+            n is split into powers of two, each of them is a single memoized jump.
+        :param n: number of generations to advance
+        :param every: if set, a copy of every k-th generation is returned
+        :return: list of (generation, board) tuples of the kept generations
+        """
+        if every or self.probes is not None:
+            # single generations are needed, one jump per generation
+            return super().advance(n, every)
+        self._jump(n)
+        return []
+
+    def _dense(self, node: Node) -> np.ndarray:
+        if node.dense is None:
+            if node.level == 0:
+                node.dense = np.full((1, 1), node.state, dtype=np.int8)
+            else:
+                node.dense = np.block([[self._dense(node.nw), self._dense(node.ne)],
+                                       [self._dense(node.sw), self._dense(node.se)]])
+        return node.dense
+
+    def _fill(self, node: Node, nx: int, ny: int, out: np.ndarray, wx: int, wy: int) -> None:
+        """copies cells of node placed at nx, ny into out, which shows the area starting at wx, wy"""
+        side = 1 << node.level
+        height, width = out.shape
+        x1, x2 = max(nx, wx), min(nx + side, wx + width)
+        y1, y2 = max(ny, wy), min(ny + side, wy + height)
+        if not node.populated or x1 >= x2 or y1 >= y2:
+            return
+        if node.level <= DENSE_LEVEL:
+            out[y1 - wy:y2 - wy, x1 - wx:x2 - wx] = self._dense(node)[y1 - ny:y2 - ny, x1 - nx:x2 - nx]
+            return
+        half = side >> 1
+        self._fill(node.nw, nx, ny, out, wx, wy)
+        self._fill(node.ne, nx + half, ny, out, wx, wy)
+        self._fill(node.sw, nx, ny + half, out, wx, wy)
+        self._fill(node.se, nx + half, ny + half, out, wx, wy)
+
+    def get_board(self, x: int, y: int, width: int = -1, height: int = -1, pad: bool = False) -> np.ndarray:
+        """
+            get_board returns part of the board as numpy.ndarray
+        :param x: horizontal element of the top left element to return
+        :param y: vertical element of the top left element to return
+        :param width: width of the returned board
+        :param height: height of the returned board
+        :param pad: whether the resulting array should be padded
+        :return:
+        """
+        if width == -1:
+            width = self.width
+        if height == -1:
+            height = self.height
+        if not pad:
+            width = max(0, min(width, self.width - x))
+            height = max(0, min(height, self.height - y))
+        board = np.zeros((height, width), dtype=np.int8)
+        # only the part inside of the logical board is filled, the rest is padding
+        inside = board[:max(0, self.height - y), :max(0, self.width - x)]
+        self._fill(self.root, 0, 0, inside, x + self.ox, y + self.oy)
+        return board
+
+    def expand_board(self, x1: int, x2: int, y1: int, y2: int) -> None:
+        """
+            expand_board expands the board in 4 direction
+        :param x1: expansion to the left
+        :param x2: expansion to the right
+        :param y1: expansion to the top
+        :param y2: expansion to the bottom
+        """
+        self.ox -= x1
+        self.oy -= y1
+        self.width += x1 + x2
+        self.height += y1 + y2
+        while (self.ox < 0 or self.oy < 0 or self.ox + self.width > 1 << self.root.level
+               or self.oy + self.height > 1 << self.root.level):
+            self._grow_root()
+
+    @staticmethod
+    def get_color_dict() -> dict:
+        return WireWorld.get_color_dict()
+
+    @staticmethod
+    def color_table() -> list:
+        return WireWorld.color_table()
+
+    @staticmethod
+    def possible_values() -> list:
+        return WireWorld.possible_values()
+
+    @staticmethod
+    def state_names() -> list:
+        return WireWorld.state_names()
+
+    def get_board_size(self) -> tuple:
+        return self.width, self.height
+
+    def load_board(self, filename: str):
+        self._build_board(board_format.open_board(filename))
+
+    def save_board(self, filename: str):
+        board_format.save_board(filename, board_format.GameView(self))
+
+    def reset_board(self):
+        self.root = self._empty(self.root.level)
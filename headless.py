@@ -0,0 +1,183 @@
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from engines import ENGINES, make_game
+from game import ELECTRON_HEAD
+from instrumentation import Instruments
+from probes import ProbeTrace
+from recorder import Recorder
+
+
+class Idle:
+    """stops once there are no electron heads on the board"""
+
+    def __call__(self, game) -> bool:
+        return not (game.get_board(0, 0) == ELECTRON_HEAD).any()
+
+
+class Stable:
+    """stops once a generation is the same as the previous one"""
+
+    def __init__(self):
+        self.previous = None
+
+    def __call__(self, game) -> bool:
+        board = np.array(game.get_board(0, 0))
+        stable = self.previous is not None and np.array_equal(board, self.previous)
+        self.previous = board
+        return stable
+
+
+class Cycle:
+    """stops once the game is periodic"""
+
+    def __call__(self, game) -> bool:
+        return game.period() is not None
+
+
+CONDITIONS = {"idle": Idle, "stable": Stable, "cycle": Cycle}
+
+
+def parse_probe(text: str) -> tuple:
+    """
+        parse_probe reads probe given as NAME=X,Y
+    :return: tuple of (name, (x, y))
+    """
+    name, _, position = text.partition("=")
+    try:
+        x, y = (int(value) for value in position.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("probe has to be given as NAME=X,Y, got {}".format(text))
+    if not name or any(character.isspace() for character in name):
+        raise argparse.ArgumentTypeError("probe name has to be non-empty without spaces, got {}".format(text))
+    return name, (x, y)
+
+
+def snapshot_name(output_dir: str, filename: str, label: str, extension: str) -> str:
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(output_dir, "{}_{}.{}".format(stem, label, extension))
+
+
+def simulate(filename: str, engine: str, generations: int, until: str, snapshot_every: int, output_dir: str,
+             extension: str = "npy", record: bool = False, probes: list = None, metrics: bool = False) -> dict:
+    """
+        simulate runs one board file
+    :param filename: board to load
+    :param engine: name of the engine from ENGINES
+    :param generations: number of generations to run, with until it is the limit
+    :param until: name of the stop condition from CONDITIONS or None
+    :param snapshot_every: save the board every that many generations, 0 for no snapshots
+    :param output_dir: directory for snapshots and final boards
+    :param extension: file format of snapshots and final boards, npy or wwb
+    :param record: whether to write the history of the run to a recording
+    :param probes: list of (name, (x, y)) probes, their heads are written to a VCD trace
+    :param metrics: whether to time the game methods and write the metrics as JSON
+    :return: summary of the run
+    """
+    game = make_game(engine)
+    game.load_board(filename)
+    condition = None
+    if until is not None:
+        condition = CONDITIONS[until]()
+        if until == "cycle":
+            game.track_cycles()
+
+    stopped = False
+
+    def stop(g) -> bool:
+        nonlocal stopped
+        stopped = condition is not None and condition(g)
+        return stopped
+
+    trace = None
+    if probes:
+        trace = ProbeTrace(dict(probes))
+        game.attach_probes(trace)
+    instruments = None
+    if metrics:
+        instruments = Instruments()
+        game.attach_instruments(instruments)
+    runner = game
+    if record:
+        runner = Recorder(game, snapshot_name(output_dir, filename, "history", "wwr"))
+
+    start = time.perf_counter()
+    done = 0
+    chunk = snapshot_every or generations
+    while done < generations and not stopped:
+        steps = min(chunk, generations - done)
+        if condition is None and not record:
+            game.advance(steps)
+        else:
+            steps = runner.run_until(stop, steps)
+        done += steps
+        if snapshot_every and game.generation % snapshot_every == 0:
+            game.save_board(snapshot_name(output_dir, filename, "{:08d}".format(game.generation), extension))
+    seconds = time.perf_counter() - start
+    if record:
+        runner.close()
+    if instruments is not None:
+        instruments.count_cells(game)
+        instruments.export(snapshot_name(output_dir, filename, "metrics", "json"))
+    if trace is not None:
+        trace.write_vcd(snapshot_name(output_dir, filename, "probes", "vcd"))
+    game.save_board(snapshot_name(output_dir, filename, "final", extension))
+
+    summary = {"file": filename, "generations": done, "seconds": seconds, "stopped": stopped}
+    if until == "cycle":
+        summary["period"] = game.period()
+    if trace is not None:
+        summary["events"] = {name: len(events) for name, events in zip(trace.names, trace.events)}
+    if hasattr(game, "close"):
+        game.close()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run WireWorld boards without the user interface")
+    parser.add_argument("files", nargs="+", help="board files to simulate")
+    parser.add_argument("-n", "--generations", type=int, required=True,
+                        help="generations to run, the limit when --until is given")
+    parser.add_argument("--until", choices=sorted(CONDITIONS), help="stop early once the condition holds")
+    parser.add_argument("--snapshot-every", type=int, default=0, help="save the board every that many generations")
+    parser.add_argument("-o", "--output-dir", default=".", help="directory for snapshots and final boards")
+    parser.add_argument("--format", choices=["npy", "wwb"], default="npy", help="file format of saved boards")
+    parser.add_argument("--record", action="store_true", help="write the history of every run to a .wwr recording")
+    parser.add_argument("--probe", type=parse_probe, action="append", default=[], metavar="NAME=X,Y",
+                        help="record generations with an electron head on cell X,Y to a VCD trace, can be repeated")
+    parser.add_argument("--metrics", action="store_true", help="write timing histograms and cell counts as JSON")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="wireworld", help="simulation engine")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="boards simulated in parallel, 0 for all cores")
+    args = parser.parse_args(argv)
+
+    if args.until == "cycle" and not hasattr(make_game(args.engine), "track_cycles"):
+        parser.error("engine {} cannot detect cycles".format(args.engine))
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = [(filename, args.engine, args.generations, args.until, args.snapshot_every, args.output_dir, args.format,
+             args.record, args.probe, args.metrics)
+            for filename in args.files]
+    if args.jobs == 1 or len(jobs) == 1:
+        results = map(lambda job: simulate(*job), jobs)
+    else:
+        pool = Pool(args.jobs or None)
+        results = pool.starmap(simulate, jobs)
+        pool.close()
+    for result in results:
+        line = "{file}: {generations} generations in {seconds:.3f} s".format(**result)
+        if result["stopped"]:
+            line += ", stopped by --until"
+        if result.get("period") is not None:
+            line += ", period {}".format(result["period"])
+        if "events" in result:
+            line += ", probe heads " + " ".join("{}={}".format(*item) for item in result["events"].items())
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+from collections import deque
+
+from game import Game
+
+# number of checkpoints kept for undoing by default
+DEPTH = 200
+
+
+class History:
+    """
+        History keeps checkpoints of a game to undo edits and step back through generations.
+        A checkpoint is saved before every change, undo restores the last one and redo
+        goes forward again. How much a checkpoint costs depends on the engine, the chunked
+        engine shares unchanged chunks between checkpoints so they stay cheap on large boards.
+        Engines copying the whole board only keep the first of consecutive generations.
+    """
+
+    def __init__(self, game: Game, depth: int = DEPTH):
+        """
+        :param game: game to keep checkpoints of, it has to support Game.checkpoint
+        :param depth: maximal number of checkpoints to undo, the oldest are dropped
+        """
+        self.game = game
+        self.undo_stack = deque(maxlen=depth)
+        self.redo_stack = []
+        # whether the last checkpoint was saved by save_generation with nothing done since
+        self.stepping = False
+
+    def save(self) -> None:
+        """
+            save stores the current state of the game before it is changed, it can not be redone anymore
+        """
+        self.undo_stack.append(self.game.checkpoint())
+        self.redo_stack.clear()
+        self.stepping = False
+
+    def save_generation(self) -> None:
+        """
+            save_generation stores the state of the game before a generation is computed.
+            Unless the engine shares checkpoints, only the first of consecutive generations is saved,
+            undo then goes back to before all of them.
+        """
+        if self.game.SHARED_CHECKPOINTS or not self.stepping:
+            self.save()
+            self.stepping = True
+
+    def undo(self) -> bool:
+        """
+            undo brings the game back to the last saved checkpoint
+        :return: whether there was a checkpoint to go back to
+        """
+        if not self.undo_stack:
+            return False
+        self.redo_stack.append(self.game.checkpoint())
+        self.game.restore(self.undo_stack.pop())
+        self.stepping = False
+        return True
+
+    def redo(self) -> bool:
+        """
+            redo reverts the last undo
+        :return: whether there was an undo to revert
+        """
+        if not self.redo_stack:
+            return False
+        self.undo_stack.append(self.game.checkpoint())
+        self.game.restore(self.redo_stack.pop())
+        self.stepping = False
+        return True
+
+    def clear(self) -> None:
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.stepping = False
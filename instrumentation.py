@@ -0,0 +1,171 @@
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from game import Game
+
+# game methods timed once instruments are attached
+TIMED_METHODS = ["next", "advance", "run_until", "get_board", "get_changes", "get_board_reduced"]
+
+
+class Histogram:
+    """
+        Histogram of durations in power of two buckets of microseconds,
+        bucket i holds durations shorter than 2 ** i microseconds
+    """
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+            percentile returns upper bound in seconds of the bucket holding the q-th percentile
+        """
+        wanted = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= wanted:
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count, "total": self.total, "mean": self.mean(), "max": self.max,
+            "p50": self.percentile(50), "p99": self.percentile(99),
+            "buckets_us": {1 << i: count for i, count in enumerate(self.counts) if count},
+        }
+
+
+class Instruments:
+    """
+        Instruments collects timing histograms of named stages, cell counts and frame rates.
+        Attached to a game with Game.attach_instruments it times the game methods
+        by wrapping them on the instance, so a game without instruments runs unchanged.
+    """
+
+    def __init__(self, window: int = 120):
+        """
+        :param window: number of recent frames the achieved frame rate is computed from
+        """
+        self.histograms = {}
+        # (time, generation) of recent frames
+        self.frames = deque(maxlen=window)
+        self.target_fps = None
+        self.cell_counts = None
+        # whether a wrapped method is running, methods it calls are part of its time
+        self.running = False
+
+    def record(self, stage: str, seconds: float) -> None:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.add(seconds)
+
+    @contextmanager
+    def timed(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def wrap(self, stage: str, function):
+        """
+            wrap returns function which records its duration under stage,
+            only the outermost of nested wrapped calls is recorded, next calling advance is one generation
+        """
+        def timed(*args, **kwargs):
+            if self.running:
+                return function(*args, **kwargs)
+            self.running = True
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.running = False
+                self.record(stage, time.perf_counter() - start)
+        return timed
+
+    def attach(self, game: Game) -> None:
+        for name in TIMED_METHODS:
+            setattr(game, name, self.wrap(name, getattr(type(game), name).__get__(game)))
+
+    @staticmethod
+    def detach(game: Game) -> None:
+        for name in TIMED_METHODS:
+            game.__dict__.pop(name, None)
+
+    def frame(self, generation: int) -> None:
+        """
+            frame notes that a frame showing generation was displayed
+        """
+        self.frames.append((time.perf_counter(), generation))
+
+    def fps(self) -> float:
+        """
+            fps returns the achieved number of frames per second
+        """
+        if len(self.frames) < 2 or self.frames[-1][0] == self.frames[0][0]:
+            return 0.0
+        return (len(self.frames) - 1) / (self.frames[-1][0] - self.frames[0][0])
+
+    def generations_per_second(self) -> float:
+        if len(self.frames) < 2 or self.frames[-1][0] == self.frames[0][0]:
+            return 0.0
+        return (self.frames[-1][1] - self.frames[0][1]) / (self.frames[-1][0] - self.frames[0][0])
+
+    def count_cells(self, game: Game) -> dict:
+        """
+            count_cells updates the number of cells in every state, keyed by the state names of the game
+        """
+        counts = game.count_cells()
+        self.cell_counts = dict(zip(game.state_names(), (int(count) for count in counts)))
+        return self.cell_counts
+
+    def metrics(self) -> dict:
+        return {
+            "stages": {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+            "cells": self.cell_counts,
+            "fps": self.fps(),
+            "target_fps": self.target_fps,
+            "generations_per_second": self.generations_per_second(),
+        }
+
+    def export(self, filename: str) -> None:
+        """
+            export writes the metrics as JSON
+        """
+        with open(filename, "w") as file:
+            json.dump(self.metrics(), file, indent=2)
+
+    def overlay_text(self) -> str:
+        """
+            overlay_text summarises the metrics in a few short lines
+        """
+        target = "" if not self.target_fps else " / {:g}".format(self.target_fps)
+        lines = ["fps {:.1f}{}  gen/s {:.0f}".format(self.fps(), target, self.generations_per_second())]
+        for stage, histogram in sorted(self.histograms.items()):
+            lines.append("{} {:.2f} ms p99 {:.2f} ms".format(
+                stage, histogram.mean() * 1e3, histogram.percentile(99) * 1e3))
+        if self.cell_counts:
+            # every state but the empty one
+            counts = list(self.cell_counts.items())[1:]
+            lines.append("  ".join("{} {}".format(name, count) for name, count in counts))
+        return "\n".join(lines)
+
@@ -0,0 +1,85 @@
+import numpy as np
+
+import game
+from game import WireWorld, EMPTY, ELECTRON_HEAD, ELECTRON_TAIL, CONDUCTOR
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# whether the compiled kernel can be used, numba is an optional dependency
+AVAILABLE = numba is not None
+
+if AVAILABLE:
+    @numba.njit(parallel=True, cache=True)
+    def _step_kernel(board, out):
+        height, width = board.shape
+        # rows are independent, they are split between the cores
+        for y in numba.prange(height):
+            for x in range(width):
+                cell = board[y, x]
+                if cell == ELECTRON_HEAD:
+                    out[y, x] = ELECTRON_TAIL
+                elif cell == ELECTRON_TAIL:
+                    out[y, x] = CONDUCTOR
+                elif cell == CONDUCTOR:
+                    heads = 0
+                    for ny in range(max(y - 1, 0), min(y + 2, height)):
+                        for nx in range(max(x - 1, 0), min(x + 2, width)):
+                            if board[ny, nx] == ELECTRON_HEAD:
+                                heads += 1
+                    out[y, x] = ELECTRON_HEAD if 1 <= heads <= 2 else CONDUCTOR
+                else:
+                    out[y, x] = EMPTY
+
+
+def step(board: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+        step computes the next WireWorld generation in a single compiled pass over the board,
+        without the temporary masks of game.step. Without numba it is game.step.
+    :param board: board in the current state, the last two axes are the board
+    :param out: optional array of the same shape to write the new state into
+    :return: new board in the next state
+    """
+    if not AVAILABLE:
+        return game.step(board, out=out)
+    if out is None:
+        out = np.empty_like(board)
+    # leading axes of a batch are stepped board by board
+    for index in np.ndindex(board.shape[:-2]):
+        _step_kernel(board[index], out[index])
+    return out
+
+
+class JitWireWorld(WireWorld):
+    """
+        JitWireWorld is WireWorld stepped by the compiled kernel of step.
+        Each generation is one parallel pass writing straight into the spare buffer.
+        The kernel can be switched off at runtime, and it is off when numba is not installed.
+    """
+
+    def __init__(self, board: np.ndarray = None, jit: bool = True):
+        """
+        :param board: initial board
+        :param jit: whether the compiled kernel should be used
+        """
+        super().__init__(board)
+        self.jit = jit
+
+    @property
+    def jit(self) -> bool:
+        return self._jit
+
+    @jit.setter
+    def jit(self, enabled: bool) -> None:
+        self._jit = enabled and AVAILABLE
+
+    def _step(self) -> None:
+        if not self.jit:
+            super()._step()
+            return
+        y1, y2, x1, x2 = self.wire_box
+        _step_kernel(self.board[y1:y2, x1:x2], self.spare[y1:y2, x1:x2])
+        self.board, self.spare = self.spare, self.board
+        self.generation += 1
@@ -1,12 +1,34 @@
+import argparse
 import sys
 
+import numpy as np
 from PyQt5.QtWidgets import QApplication
 
 import main_ui
+import rules
+from engines import ENGINES, make_game
+from rule_game import RuleGame
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = main_ui.MainWindow()
+    parser = argparse.ArgumentParser(description="WireWorld Simulator")
+    parser.add_argument("--rule", help="run another automaton, like life, brians-brain or B36/S23")
+    parser.add_argument("--engine", choices=sorted(ENGINES), help="simulation engine, wireworld by default")
+    args, qt_args = parser.parse_known_args()
+    if args.rule and args.engine not in (None, "table"):
+        parser.error("--rule runs on the table engine")
+    rule = None
+    if args.rule:
+        try:
+            rule = rules.get_rule(args.rule)
+        except ValueError as error:
+            parser.error(str(error))
+    app = QApplication(sys.argv[:1] + qt_args)
+    game = None
+    if rule is not None:
+        game = RuleGame(np.zeros((40, 40), dtype=np.int8), rule)
+    elif args.engine is not None:
+        game = make_game(args.engine)
+    window = main_ui.MainWindow(game)
     # window.setStyleSheet("border: 1px solid blue;")
     window.show()
     app.exec_()
@@ -4,6 +4,7 @@ from PyQt5.QtWidgets import QMainWindow, QPushButton, QDoubleSpinBox, QHBoxLayou
     QFileDialog, QDialog, QFrame
 
 import game
+import instrumentation
 from game_board_ui import GameBoardUI
 
 
@@ -22,7 +23,10 @@ class MainWindow(QMainWindow):
     """
         MainWindows holds controls, game board, and file handling UI
     """
-    def __init__(self):
+    def __init__(self, init_game=None):
+        """
+        :param init_game: game to show, a WireWorld board by default
+        """
         super().__init__()
         self.title = "WireWorld Simulator"
         self.setWindowTitle(self.title)
@@ -35,10 +39,13 @@ class MainWindow(QMainWindow):
         # Control UI elements
         self.play_button = QPushButton("Play")
         self.next_frame_button = QPushButton("Next Frame")
+        self.stats_button = QPushButton("Stats")
+        self.stats_button.setCheckable(True)
         self.speed_selector, self.speed_selector_layout = make_speed_selector()
 
         # Game board
-        init_game = game.WireWorld()
+        if init_game is None:
+            init_game = game.WireWorld()
         self.game_holder = GameBoardUI(init_game)
 
         # Control UI elements functionality
@@ -46,6 +53,7 @@ class MainWindow(QMainWindow):
         self.play_button.clicked.connect(self.play)
 
         self.next_frame_button.clicked.connect(self.next_frame)
+        self.stats_button.toggled.connect(self.show_stats)
 
         self.fps = 15
         self.speed_selector.setValue(self.fps)
@@ -57,6 +65,7 @@ class MainWindow(QMainWindow):
         control_layout.addLayout(self.speed_selector_layout)
         control_layout.addWidget(self.next_frame_button)
         control_layout.addWidget(self.play_button)
+        control_layout.addWidget(self.stats_button)
 
         control.setFixedWidth(600)
         control.setLayout(control_layout)
@@ -92,8 +101,7 @@ class MainWindow(QMainWindow):
         self.game_holder.next_frame()
 
     def play(self):
-        time_delimiter = int(1 / self.fps * 1000)
-        self.game_holder.play(time_delimiter)
+        self.game_holder.play(self.time_delimiter())
 
         if self.game_holder.state == "paused":
             self.play_button.setText("Play")
@@ -112,19 +120,33 @@ class MainWindow(QMainWindow):
         layout.addWidget(load)
         return layout
 
+    def time_delimiter(self) -> int:
+        # 0 frames per second runs the simulation as fast as possible
+        return int(1 / self.fps * 1000) if self.fps > 0 else 0
+
     def fps_change(self, v: float):
         self.fps = v
+        self.game_holder.set_speed(self.time_delimiter())
+        if self.game_holder.instruments is not None:
+            self.game_holder.instruments.target_fps = self.fps
+
+    def show_stats(self, shown: bool):
+        instruments = None
+        if shown:
+            instruments = instrumentation.Instruments()
+            instruments.target_fps = self.fps
+        self.game_holder.set_instruments(instruments)
 
     def load_file(self):
         dialog = QDialog()
         dialog.setModal(True)
-        filename, _ = QFileDialog.getOpenFileName(dialog, 'Load file', '', 'Numpy File(*.npy)')
+        filename, _ = QFileDialog.getOpenFileName(dialog, 'Load file', '', 'Board Files(*.wwb *.npy)')
         if filename:
             self.game_holder.load_game_file(filename)
 
     def save_file(self):
         dialog = QDialog()
         dialog.setModal(True)
-        filename, _ = QFileDialog.getSaveFileName(dialog, 'Save file', '', 'Numpy File(*.npy)')
+        filename, _ = QFileDialog.getSaveFileName(dialog, 'Save file', '', 'WireWorld Board(*.wwb);;Numpy File(*.npy)')
         if filename:
             self.game_holder.save_game_file(filename)
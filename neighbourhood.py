@@ -1,5 +1,8 @@
 import numpy as np
 
+# (dy, dx) offsets of the eight Moore neighbours
+MOORE_OFFSETS = [(dy, dx) for dy in range(-1, 2) for dx in range(-1, 2) if (dy, dx) != (0, 0)]
+
 
 def moore_pad(arr: np.ndarray, x: int, y: int):
     padded_arr = np.pad(arr, 1, mode='constant', constant_values=0)
@@ -18,6 +21,27 @@ def moore_hard(arr: np.ndarray, x: int, y: int):
     return arr[y_coords, x_coords]
 
 
+def moore_count(mask: np.ndarray) -> np.ndarray:
+    """
+        moore_count counts, for every cell at once, how many of its Moore neighbours are set in mask.
+        Cells outside of the board count as not set.
+    :param mask: boolean array, the last two axes are treated as the board
+    :return: array of neighbour counts with the same shape as mask
+    """
+    mask = mask.view(np.uint8)
+    counts = np.zeros(mask.shape, dtype=np.uint8)
+    # every cell adds itself to its neighbours by summing shifted slices
+    counts[..., 1:, :] += mask[..., :-1, :]
+    counts[..., :-1, :] += mask[..., 1:, :]
+    counts[..., :, 1:] += mask[..., :, :-1]
+    counts[..., :, :-1] += mask[..., :, 1:]
+    counts[..., 1:, 1:] += mask[..., :-1, :-1]
+    counts[..., 1:, :-1] += mask[..., :-1, 1:]
+    counts[..., :-1, 1:] += mask[..., 1:, :-1]
+    counts[..., :-1, :-1] += mask[..., 1:, 1:]
+    return counts
+
+
 if __name__ == "__main__":
     test_matrix = np.zeros((4, 4))
     test_matrix[0, 0] = 1
@@ -0,0 +1,274 @@
+import numpy as np
+
+import board_format
+from game import Game, WireWorld, ELECTRON_HEAD, ELECTRON_TAIL, CONDUCTOR
+
+WORD_BITS = 64
+# rows converted between dense and packed form at once, limits temporary memory
+ROW_BLOCK = 1024
+
+ONE = np.uint64(1)
+LAST_BIT = np.uint64(WORD_BITS - 1)
+
+
+def pack_rows(mask: np.ndarray, words: int) -> np.ndarray:
+    """
+        pack_rows packs boolean rows into uint64 words, bit k of word w holds column 64 * w + k
+    :param mask: boolean array of shape (rows, columns)
+    :param words: number of words per row in the result
+    :return: uint64 array of shape (rows, words)
+    """
+    rows, columns = mask.shape
+    padded = np.zeros((rows, words * WORD_BITS), dtype=bool)
+    padded[:, :columns] = mask
+    return np.packbits(padded, axis=1, bitorder="little").view("<u8")
+
+
+def unpack_rows(plane: np.ndarray, x: int, width: int) -> np.ndarray:
+    """
+        unpack_rows unpacks columns x to x + width of packed rows into a boolean array
+    :param plane: uint64 array of packed rows
+    :param x: first column to unpack
+    :param width: number of columns to unpack
+    :return: boolean array of shape (rows, width)
+    """
+    first_word = x // WORD_BITS
+    last_word = -(-(x + width) // WORD_BITS)
+    words = np.ascontiguousarray(plane[:, first_word:last_word]).astype("<u8")
+    bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder="little")
+    offset = x - first_word * WORD_BITS
+    return bits[:, offset:offset + width].astype(bool)
+
+
+def shift_west(plane: np.ndarray) -> np.ndarray:
+    """value of the left neighbour moved into every bit"""
+    shifted = plane << ONE
+    shifted[:, 1:] |= plane[:, :-1] >> LAST_BIT
+    return shifted
+
+
+def shift_east(plane: np.ndarray) -> np.ndarray:
+    """value of the right neighbour moved into every bit"""
+    shifted = plane >> ONE
+    shifted[:, :-1] |= plane[:, 1:] << LAST_BIT
+    return shifted
+
+
+def shift_north(plane: np.ndarray) -> np.ndarray:
+    """value of the upper neighbour moved into every bit"""
+    shifted = np.zeros_like(plane)
+    shifted[1:] = plane[:-1]
+    return shifted
+
+
+def shift_south(plane: np.ndarray) -> np.ndarray:
+    """value of the lower neighbour moved into every bit"""
+    shifted = np.zeros_like(plane)
+    shifted[:-1] = plane[1:]
+    return shifted
+
+
+def neighbour_planes(plane: np.ndarray):
+    """
+        neighbour_planes yields plane shifted towards each of the eight Moore neighbours,
+        one at a time so that only one shifted plane besides west and east is alive
+    :param plane: uint64 array of packed rows
+    """
+    west = shift_west(plane)
+    east = shift_east(plane)
+    yield west
+    yield east
+    for horizontal in (plane, west, east):
+        yield shift_north(horizontal)
+        yield shift_south(horizontal)
+
+
+def one_or_two_neighbours(plane: np.ndarray) -> np.ndarray:
+    """
+        one_or_two_neighbours marks bits that have one or two set Moore neighbours in plane
+        Neighbours are summed with bit-sliced adders working on whole words at once.
+    :param plane: uint64 array of packed rows
+    :return: uint64 array of packed rows with the result
+    """
+    # ones and twos hold the count modulo 4, fours is set once the count reaches 4
+    ones = np.zeros_like(plane)
+    twos = np.zeros_like(plane)
+    fours = np.zeros_like(plane)
+    # every shifted plane is added as soon as it is computed
+    for bit in neighbour_planes(plane):
+        carry = ones & bit
+        ones ^= bit
+        fours |= twos & carry
+        twos ^= carry
+    return (ones ^ twos) & ~fours
+
+
+class PackedWireWorld(Game):
+    """
+        PackedWireWorld stores the board as three bit-planes (head, tail, conductor)
+        packed into uint64 words, so a cell takes 3 bits instead of 8.
+        A step works on whole words, 64 cells at a time.
+    """
+
+    def __init__(self, board: np.ndarray = None):
+        super().__init__()
+        if board is None:
+            board = WireWorld().get_board(0, 0)
+        self._allocate(*board.shape[::-1])
+        self._pack(board, 0, 0)
+
+    def _allocate(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        words = -(-width // WORD_BITS)
+        self.head = np.zeros((height, words), dtype=np.uint64)
+        self.tail = np.zeros((height, words), dtype=np.uint64)
+        self.conductor = np.zeros((height, words), dtype=np.uint64)
+
+    def _pack(self, board: np.ndarray, x: int, y: int) -> None:
+        """writes dense board into the planes with its top left corner at x, y"""
+        height, width = board.shape
+        words = self.head.shape[1]
+        for start in range(0, height, ROW_BLOCK):
+            rows = np.asarray(board[start:start + ROW_BLOCK])
+            padded = np.zeros((rows.shape[0], x + width), dtype=rows.dtype)
+            padded[:, x:] = rows
+            target = slice(y + start, y + start + rows.shape[0])
+            self.head[target] = pack_rows(padded == ELECTRON_HEAD, words)
+            self.tail[target] = pack_rows(padded == ELECTRON_TAIL, words)
+            self.conductor[target] = pack_rows(padded == CONDUCTOR, words)
+
+    def checkpoint(self):
+        """
+            checkpoint returns the current board and generation to be given to restore later, the planes are copied
+        """
+        return self.head.copy(), self.tail.copy(), self.conductor.copy(), self.width, self.height, self.generation
+
+    def restore(self, checkpoint) -> None:
+        """
+            restore brings back the board and generation of a checkpoint, which can be restored again later
+        :param checkpoint: value returned by checkpoint
+        """
+        head, tail, conductor, self.width, self.height, self.generation = checkpoint
+        self.head, self.tail, self.conductor = head.copy(), tail.copy(), conductor.copy()
+
+    def add(self, x: int, y: int) -> None:
+        """
+            Add updates board by iterating to next value of state
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        """
+        value = self.get_board(x, y, 1, 1)[0, 0]
+        self.set(x, y, (value - 1) % 4)
+
+    def set(self, x: int, y: int, v: int) -> None:
+        """
+            Set updates the board position x, y with value v
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        :param v: value to put in place
+        """
+        self._check_cells(x, y)
+        word = x // WORD_BITS
+        bit = ONE << np.uint64(x % WORD_BITS)
+        for value, plane in ((ELECTRON_HEAD, self.head), (ELECTRON_TAIL, self.tail), (CONDUCTOR, self.conductor)):
+            if value == v:
+                plane[y, word] |= bit
+            else:
+                plane[y, word] &= ~bit
+
+    def next(self) -> None:
+        """
+            Next updates the game to the new state
+        """
+        excited = self.conductor & one_or_two_neighbours(self.head)
+        # conductor -> head, head -> tail, tail -> conductor
+        new_conductor = (self.conductor & ~excited) | self.tail
+        self.tail = self.head
+        self.head = excited
+        self.conductor = new_conductor
+        self.generation += 1
+
+    def get_board(self, x: int, y: int, width: int = -1, height: int = -1, pad: bool = False) -> np.ndarray:
+        """
+            get_board returns part of the board as numpy.ndarray
+        :param x: horizontal element of the top left element to return
+        :param y: vertical element of the top left element to return
+        :param width: width of the returned board
+        :param height: height of the returned board
+        :param pad: whether the resulting array should be padded
+        :return:
+        """
+        if width == -1:
+            width = self.width
+        if height == -1:
+            height = self.height
+        if not pad:
+            width = max(0, min(width, self.width - x))
+            height = max(0, min(height, self.height - y))
+        board = np.zeros((height, width), dtype=np.int8)
+        rows = slice(y, min(y + height, self.height))
+        columns = max(0, min(width, self.width - x))
+        if columns == 0 or rows.start >= rows.stop:
+            return board
+        window = board[:rows.stop - rows.start, :columns]
+        window[unpack_rows(self.head[rows], x, columns)] = ELECTRON_HEAD
+        window[unpack_rows(self.tail[rows], x, columns)] = ELECTRON_TAIL
+        window[unpack_rows(self.conductor[rows], x, columns)] = CONDUCTOR
+        return board
+
+    def expand_board(self, x1: int, x2: int, y1: int, y2: int) -> None:
+        """
+            expand_board expands the board in 4 direction
+        :param x1: expansion to the left
+        :param x2: expansion to the right
+        :param y1: expansion to the top
+        :param y2: expansion to the bottom
+        """
+        old = PackedWireWorld.__new__(PackedWireWorld)
+        old.width, old.height = self.width, self.height
+        old.head, old.tail, old.conductor = self.head, self.tail, self.conductor
+        self._allocate(self.width + x1 + x2, self.height + y1 + y2)
+        for start in range(0, old.height, ROW_BLOCK):
+            self._pack(old.get_board(0, start, old.width, ROW_BLOCK), x1, y1 + start)
+
+    @staticmethod
+    def get_color_dict() -> dict:
+        return WireWorld.get_color_dict()
+
+    @staticmethod
+    def color_table() -> list:
+        return WireWorld.color_table()
+
+    @staticmethod
+    def possible_values() -> list:
+        return WireWorld.possible_values()
+
+    @staticmethod
+    def state_names() -> list:
+        return WireWorld.state_names()
+
+    def get_board_size(self) -> tuple:
+        return self.width, self.height
+
+    def load_board(self, filename: str):
+        # memory mapped or read lazily, so the dense board is never fully read into memory
+        board = board_format.open_board(filename)
+        self._allocate(*board.shape[::-1])
+        self._pack(board, 0, 0)
+
+    def save_board(self, filename: str):
+        if filename.endswith(board_format.EXTENSION):
+            board_format.save(filename, board_format.GameView(self))
+            return
+        # named like np.save names its files
+        if not filename.endswith(".npy"):
+            filename += ".npy"
+        board = np.lib.format.open_memmap(filename, mode="w+", dtype=np.int8, shape=(self.height, self.width))
+        for start in range(0, self.height, ROW_BLOCK):
+            rows = self.get_board(0, start, self.width, ROW_BLOCK)
+            board[start:start + rows.shape[0]] = rows
+        board.flush()
+
+    def reset_board(self):
+        self._allocate(self.width, self.height)
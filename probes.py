@@ -0,0 +1,126 @@
+import numpy as np
+
+from game import ELECTRON_HEAD
+
+# number of generations sampled before they are turned into events
+PENDING = 4096
+# printable characters used for VCD signal identifiers
+VCD_FIRST, VCD_LAST = 33, 126
+
+
+def vcd_identifier(index: int) -> str:
+    base = VCD_LAST - VCD_FIRST + 1
+    identifier = chr(VCD_FIRST + index % base)
+    index //= base
+    while index:
+        index -= 1
+        identifier += chr(VCD_FIRST + index % base)
+        index //= base
+    return identifier
+
+
+class ProbeTrace:
+    """
+        ProbeTrace records the generations in which named probe cells hold an electron head.
+        Attach it with Game.attach_probes, then the game samples the probes after every
+        generation it advances, and only the generations with heads are kept.
+    """
+
+    def __init__(self, probes: dict):
+        """
+        :param probes: (x, y) position of every probe by its name
+        """
+        self.names = list(probes)
+        self.xs = np.array([probes[name][0] for name in self.names], dtype=np.int64)
+        self.ys = np.array([probes[name][1] for name in self.names], dtype=np.int64)
+        # generations with a head on every probe, in increasing order
+        self._events = [[] for _ in self.names]
+        # samples not yet turned into events, so a generation costs a single row write
+        self.pending = np.zeros((PENDING, len(self.names)), dtype=np.int8)
+        self.pending_generations = np.zeros(PENDING, dtype=np.int64)
+        self.filled = 0
+        # first and last sampled generation
+        self.start = None
+        self.last = None
+
+    def sample(self, game) -> None:
+        """
+            sample reads the probe cells of game in its current generation
+        """
+        if self.filled == PENDING:
+            self._flush()
+        self.pending[self.filled] = game.probe_states(self.xs, self.ys)
+        self.pending_generations[self.filled] = game.generation
+        self.filled += 1
+        if self.start is None:
+            self.start = game.generation
+        self.last = game.generation
+
+    def _flush(self) -> None:
+        rows, probes = np.nonzero(self.pending[:self.filled] == ELECTRON_HEAD)
+        generations = self.pending_generations[rows]
+        for i, events in enumerate(self._events):
+            events.extend(generations[probes == i].tolist())
+        self.filled = 0
+
+    @property
+    def events(self) -> list:
+        """list of generations with a head for every probe"""
+        self._flush()
+        return self._events
+
+    def covers_period(self, period: int) -> bool:
+        """
+            covers_period tells whether the last period generations were all sampled
+        """
+        return self.start is not None and self.last - period >= self.start
+
+    def repeat(self, period: int, count: int) -> None:
+        """
+            repeat extends the trace by count periods of a periodic game without sampling it,
+            the events of the last period happen again every period
+        """
+        shifts = np.arange(1, count + 1, dtype=np.int64) * period
+        for events in self.events:
+            first = len(events)
+            while first and events[first - 1] > self.last - period:
+                first -= 1
+            if first < len(events):
+                events.extend(np.add.outer(shifts, events[first:]).ravel().tolist())
+        self.last += count * period
+
+    def heads(self, name: str) -> np.ndarray:
+        """
+            heads returns the generations in which probe name held an electron head
+        """
+        return np.array(self.events[self.names.index(name)], dtype=np.int64)
+
+    def write_vcd(self, filename: str) -> None:
+        """
+            write_vcd exports the trace as a Value Change Dump, one time unit per generation.
+            Every probe is a one bit signal which is high in the generations with a head.
+        """
+        identifiers = [vcd_identifier(i) for i in range(len(self.names))]
+        changes = {}
+        for identifier, events in zip(identifiers, self.events):
+            for generation in events:
+                changes.setdefault(generation, []).append("1" + identifier)
+                # a head always becomes a tail, so the signal falls in the next generation
+                changes.setdefault(generation + 1, []).append("0" + identifier)
+        with open(filename, "w") as file:
+            file.write("$timescale 1 ns $end\n$scope module wireworld $end\n")
+            for identifier, name in zip(identifiers, self.names):
+                file.write("$var wire 1 {} {} $end\n".format(identifier, name))
+            file.write("$upscope $end\n$enddefinitions $end\n")
+            start = 0 if self.start is None else self.start
+            initial = changes.pop(start, [])
+            high = {change[1:] for change in initial if change[0] == "1"}
+            file.write("#{}\n$dumpvars\n".format(start))
+            for identifier in identifiers:
+                file.write("{}{}\n".format(1 if identifier in high else 0, identifier))
+            file.write("$end\n")
+            for generation in sorted(changes):
+                file.write("#{}\n".format(generation))
+                file.write("\n".join(changes[generation]) + "\n")
+            if self.last is not None and self.last + 1 not in changes:
+                file.write("#{}\n".format(self.last + 1))
@@ -0,0 +1,219 @@
+import argparse
+import bisect
+import struct
+import sys
+
+import numpy as np
+
+import board_format
+
+MAGIC = b"WWR1"
+# magic
+HEADER = struct.Struct("<4s")
+# kind, generation, number of cells in the record
+RECORD = struct.Struct("<BQI")
+# height and width of the board, in front of keyframe data
+SHAPE = struct.Struct("<II")
+EXTENSION = ".wwr"
+
+# record kinds
+# flat indices of the changed cells followed by their new values packed in 2 bits
+DELTA = 0
+# board shape, flat indices of the non-empty cells and their values packed in 2 bits
+SPARSE_KEYFRAME = 1
+# board shape and every cell packed in 2 bits
+PACKED_KEYFRAME = 2
+
+KEYFRAMES = (SPARSE_KEYFRAME, PACKED_KEYFRAME)
+
+
+def encode_cells(indices: np.ndarray, values: np.ndarray) -> bytes:
+    return indices.astype("<u4").tobytes() + board_format.pack_2bit(values).tobytes()
+
+
+def decode_cells(data: bytes, count: int) -> tuple:
+    indices = np.frombuffer(data[:4 * count], dtype="<u4")
+    return indices, board_format.unpack_2bit(np.frombuffer(data[4 * count:], dtype=np.uint8), count)
+
+
+def cells_length(count: int) -> int:
+    return 4 * count + -(-count // 4)
+
+
+class Recorder:
+    """
+        Recorder streams the history of a game to a file.
+        Every recorded generation is stored as the cells that changed since the
+        previously recorded one, with a full keyframe every keyframe_every generations,
+        so the file grows with the activity of the circuit rather than with its size.
+    """
+
+    def __init__(self, game, filename: str, keyframe_every: int = 1000):
+        """
+        :param game: game to record, its current state is recorded as the first keyframe
+        :param filename: file to write
+        :param keyframe_every: number of generations between keyframes
+        """
+        self.game = game
+        self.keyframe_every = keyframe_every
+        self.file = open(filename, "wb")
+        self.file.write(HEADER.pack(MAGIC))
+        self.board = None
+        self.keyframe_generation = 0
+        self.keyframe()
+
+    def keyframe(self) -> None:
+        """
+            keyframe writes the whole current board
+        """
+        self.board = np.array(self.game.get_board(0, 0), dtype=np.int8)
+        self.keyframe_generation = self.game.generation
+        height, width = self.board.shape
+        indices = np.flatnonzero(self.board)
+        if cells_length(len(indices)) < -(-self.board.size // 4):
+            kind, count, data = SPARSE_KEYFRAME, len(indices), encode_cells(indices, self.board.ravel()[indices])
+        else:
+            kind, count, data = PACKED_KEYFRAME, self.board.size, board_format.pack_2bit(self.board).tobytes()
+        self.file.write(RECORD.pack(kind, self.game.generation, count))
+        self.file.write(SHAPE.pack(height, width))
+        self.file.write(data)
+        self.file.flush()
+
+    def record(self) -> None:
+        """
+            record writes the cells changed since the last record.
+            Call it after every generation and after editing the board.
+        """
+        board = self.game.get_board(0, 0)
+        if board.shape != self.board.shape or self.game.generation - self.keyframe_generation >= self.keyframe_every:
+            self.keyframe()
+            return
+        indices = np.flatnonzero(board != self.board)
+        values = board.ravel()[indices]
+        self.board.ravel()[indices] = values
+        self.file.write(RECORD.pack(DELTA, self.game.generation, len(indices)))
+        self.file.write(encode_cells(indices, values))
+
+    def run_until(self, predicate, limit: int = -1) -> int:
+        """
+            run_until updates the game until predicate(game) returns True, recording every generation
+        :param predicate: function called with the game after every generation
+        :param limit: maximal number of generations to run, -1 for no limit
+        :return: number of generations advanced
+        """
+        def recorded(game) -> bool:
+            self.record()
+            return predicate(game)
+        return self.game.run_until(recorded, limit)
+
+    def advance(self, n: int) -> None:
+        """
+            advance updates the game by n generations, recording every generation
+        """
+        self.run_until(lambda game: False, n)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class Recording:
+    """
+        Recording reads a file written by Recorder.
+        Only record headers are read when opening, any generation is then
+        rebuilt from the nearest keyframe before it and the deltas that follow.
+    """
+
+    def __init__(self, filename: str):
+        self.file = open(filename, "rb")
+        magic, = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("{} is not a WireWorld recording".format(filename))
+        # offset, kind, generation and count of every record
+        self.records = []
+        self.keyframes = []
+        offset = HEADER.size
+        while True:
+            header = self.file.read(RECORD.size)
+            if len(header) < RECORD.size:
+                break
+            kind, generation, count = RECORD.unpack(header)
+            length = cells_length(count)
+            if kind in KEYFRAMES:
+                if kind == PACKED_KEYFRAME:
+                    length = -(-count // 4)
+                length += SHAPE.size
+                self.keyframes.append(len(self.records))
+            self.records.append((offset, kind, generation, count))
+            offset += RECORD.size + length
+            self.file.seek(offset)
+        # a record cut short by an interrupted recording is ignored
+        if self.records and offset > self.file.seek(0, 2):
+            self.records.pop()
+            if self.keyframes and self.keyframes[-1] == len(self.records):
+                self.keyframes.pop()
+        self.keyframe_generations = [self.records[i][2] for i in self.keyframes]
+
+    @property
+    def first(self) -> int:
+        return self.records[0][2]
+
+    @property
+    def last(self) -> int:
+        return self.records[-1][2]
+
+    def _read(self, record: tuple) -> bytes:
+        offset, kind, generation, count = record
+        self.file.seek(offset + RECORD.size)
+        if kind == DELTA:
+            return self.file.read(cells_length(count))
+        if kind == SPARSE_KEYFRAME:
+            return self.file.read(SHAPE.size + cells_length(count))
+        return self.file.read(SHAPE.size + -(-count // 4))
+
+    def board(self, generation: int) -> np.ndarray:
+        """
+            board returns the board as it was at the given generation
+        """
+        if not self.records or not self.first <= generation <= self.last:
+            raise IndexError("generation {} was not recorded".format(generation))
+        k = self.keyframes[bisect.bisect_right(self.keyframe_generations, generation) - 1]
+        board = None
+        for record in self.records[k:]:
+            offset, kind, recorded, count = record
+            if recorded > generation:
+                break
+            data = self._read(record)
+            if kind == DELTA:
+                indices, values = decode_cells(data, count)
+                board.ravel()[indices] = values
+                continue
+            shape = SHAPE.unpack(data[:SHAPE.size])
+            data = data[SHAPE.size:]
+            if kind == SPARSE_KEYFRAME:
+                board = np.zeros(shape, dtype=np.int8)
+                indices, values = decode_cells(data, count)
+                board.ravel()[indices] = values
+            else:
+                board = board_format.unpack_2bit(np.frombuffer(data, dtype=np.uint8), count).reshape(shape)
+        return board
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract a generation from a WireWorld recording")
+    parser.add_argument("recording", help="recording written by Recorder")
+    parser.add_argument("-g", "--generation", type=int, help="generation to extract, the last one by default")
+    parser.add_argument("-o", "--output", required=True, help="board file to write, .npy or .wwb")
+    args = parser.parse_args(argv)
+
+    recording = Recording(args.recording)
+    generation = recording.last if args.generation is None else args.generation
+    board_format.save_board(args.output, recording.board(generation))
+    recording.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import numpy as np
+
+import board_format
+import level_of_detail
+import neighbourhood
+import rules
+from game import Game, WireWorld
+
+
+def step_rule(rule: rules.Rule, board: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+        step_rule computes the next generation of the whole board with the lookup table of rule
+    :param rule: compiled rule
+    :param board: board in the current state, the last two axes are the board
+    :param out: optional array of the same shape to write the new state into
+    :return: new board in the next state
+    """
+    index = neighbourhood.moore_count(board == rule.counted)
+    if rule.states * rules.COUNTS > 256:
+        # table indices do not fit into 8 bits
+        index = index.astype(np.intp)
+    index += board.astype(index.dtype) * rules.COUNTS
+    return np.take(rule.lookup, index, out=out)
+
+
+class RuleGame(Game):
+    """
+        RuleGame runs any rule from rules on a dense board.
+        Each generation counts the neighbours in the counted state and looks up
+        the new state of every cell at once, so every rule gets the same fast path.
+    """
+
+    def __init__(self, board: np.ndarray = None, rule: rules.Rule = rules.WIREWORLD):
+        """
+        :param board: initial board
+        :param rule: rule of the automaton, WireWorld by default
+        """
+        super().__init__()
+        if board is None:
+            board = WireWorld().get_board(0, 0)
+        self.rule = rule
+        self._check_states(board)
+        self.board = np.asarray(board, dtype=np.int8)
+        # previous generation after a step, reused as the output of the next one
+        self.spare = None
+
+    def add(self, x: int, y: int) -> None:
+        """
+            Add updates board by iterating to next value of state
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        """
+        self.set(x, y, (self.board[y, x] - 1) % self.rule.states)
+
+    def set(self, x: int, y: int, v: int) -> None:
+        """
+            Set updates the board position x, y with value v
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        :param v: value to put in place
+        """
+        self._check_cells(x, y)
+        self._check_states(v)
+        self.board[y, x] = v
+        self.spare = None
+
+    def set_cells(self, xs, ys, values) -> None:
+        """
+            set_cells updates many board positions at once, a later cell wins over an earlier one at the same position
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        :param values: value for every cell, or one value for all of them
+        """
+        self._check_cells(xs, ys)
+        self._check_states(values)
+        self.board[ys, xs] = values
+        self.spare = None
+
+    def _check_states(self, values) -> None:
+        """
+            _check_states raises ValueError when any of the values is not a state of the rule,
+            the lookup table has no entries for them
+        """
+        if np.size(values) and (np.min(values) < 0 or np.max(values) >= self.rule.states):
+            raise ValueError("{} has states 0 to {}, got values {} to {}".format(
+                self.rule.name, self.rule.states - 1, np.min(values), np.max(values)))
+
+    def checkpoint(self):
+        """
+            checkpoint returns the current board and generation to be given to restore later, the board is copied
+        """
+        return self.board.copy(), self.generation
+
+    def restore(self, checkpoint) -> None:
+        """
+            restore brings back the board and generation of a checkpoint, which can be restored again later
+        :param checkpoint: value returned by checkpoint
+        """
+        board, self.generation = checkpoint
+        self.board = board.copy()
+        self.spare = None
+
+    def next(self) -> None:
+        """
+            Next updates the game to the new state
+        """
+        if self.spare is None or self.spare.shape != self.board.shape:
+            self.spare = np.empty_like(self.board)
+        step_rule(self.rule, self.board, out=self.spare)
+        self.board, self.spare = self.spare, self.board
+        self.generation += 1
+
+    def get_board(self, x: int, y: int, width: int = -1, height: int = -1, pad: bool = False) -> np.ndarray:
+        """
+            get_board returns part of the board as numpy.ndarray
+        :param x: horizontal element of the top left element to return
+        :param y: vertical element of the top left element to return
+        :param width: width of the returned board
+        :param height: height of the returned board
+        :param pad: whether the resulting array should be padded
+        :return:
+        """
+        if width == -1:
+            width = self.board.shape[1]
+        if height == -1:
+            height = self.board.shape[0]
+        board = self.board[y:y + height, x:x + width]
+        if pad:
+            h, w = board.shape
+            board = np.pad(board, ((0, max(0, height - h)), (0, width - w)))
+        return board
+
+    def get_changes(self, x: int, y: int, width: int, height: int):
+        """
+            get_changes returns which cells of a part of the board were changed by the last generation
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the part
+        :param height: height of the part
+        :return: boolean numpy.ndarray of shape (height, width), None if changes are not known
+        """
+        if self.spare is None or self.spare.shape != self.board.shape:
+            return None
+        changes = np.zeros((height, width), dtype=bool)
+        window = self.board[y:y + height, x:x + width]
+        h, w = window.shape
+        changes[:h, :w] = window != self.spare[y:y + height, x:x + width]
+        return changes
+
+    def get_board_reduced(self, x: int, y: int, width: int, height: int, factor: int) -> np.ndarray:
+        """
+            get_board_reduced returns part of the board shrunk by factor for zoomed out viewing,
+            every factor x factor block of cells becomes its highest priority state of the rule
+        :param x: horizontal element of the top left element
+        :param y: vertical element of the top left element
+        :param width: width of the part in cells
+        :param height: height of the part in cells
+        :param factor: side of the merged blocks
+        :return: numpy.ndarray of shape (ceil(height / factor), ceil(width / factor))
+        """
+        rows, columns = -(-height // factor), -(-width // factor)
+        board = self.get_board(x, y, columns * factor, rows * factor, pad=True)
+        return level_of_detail.reduce_board(board, factor, self.rule.priority)
+
+    def count_cells(self) -> np.ndarray:
+        """
+            count_cells returns the number of cells in every state, indexed by the state
+        """
+        return np.bincount(self.board.ravel().astype(np.intp), minlength=self.rule.states)
+
+    def probe_states(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+            probe_states returns the states of the cells at given coordinates
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        """
+        states = np.zeros(len(xs), dtype=self.board.dtype)
+        inside = self._inside(xs, ys)
+        states[inside] = self.board[ys[inside], xs[inside]]
+        return states
+
+    def expand_board(self, x1: int, x2: int, y1: int, y2: int) -> None:
+        """
+            expand_board expands the board in 4 direction
+        :param x1: expansion to the left
+        :param x2: expansion to the right
+        :param y1: expansion to the top
+        :param y2: expansion to the bottom
+        """
+        self.board = np.pad(self.board, ((y1, y2), (x1, x2)))
+        self.spare = None
+
+    def get_color_dict(self) -> dict:
+        return dict(enumerate(self.rule.colors))
+
+    def color_table(self) -> list:
+        return list(self.rule.colors)
+
+    def possible_values(self) -> list:
+        return [(name, state) for state, name in enumerate(self.rule.names) if state != 0]
+
+    def state_names(self) -> list:
+        if self.rule is rules.WIREWORLD:
+            # the same names as the other engines, so their metrics can be compared
+            return WireWorld.state_names()
+        return [name.lower() for name in self.rule.names]
+
+    def get_board_size(self) -> tuple:
+        height, width = self.board.shape
+        return width, height
+
+    def load_board(self, filename: str):
+        board = board_format.load_board(filename)
+        self._check_states(board)
+        self.board = np.asarray(board, dtype=np.int8)
+        self.spare = None
+
+    def save_board(self, filename: str):
+        if self.rule.states > 4 and filename.endswith(board_format.EXTENSION):
+            raise ValueError("board files store 4 states, the rule has {}".format(self.rule.states))
+        board_format.save_board(filename, self.board)
+
+    def reset_board(self):
+        self.board.fill(0)
+        self.spare = None
@@ -0,0 +1,112 @@
+import re
+
+import numpy as np
+
+# number of possible neighbour counts in the Moore neighbourhood, 0 to 8
+COUNTS = 9
+# states are stored in int8 boards and tables, so the largest state is 127
+MAX_STATES = 128
+
+
+class Rule:
+    """
+        Rule describes an automaton whose next state depends on the state of a cell
+        and on how many of its eight neighbours are in the counted state.
+        It is compiled into a lookup table indexed by state * COUNTS + count,
+        so a generation of any rule is a single gather over the board.
+    """
+
+    def __init__(self, name: str, table, counted: int, names: list, colors: list, priority: list = None):
+        """
+        :param name: name of the rule
+        :param table: next state for every (state, count), shape (states, COUNTS)
+        :param counted: state whose neighbours are counted
+        :param names: name of every state, state 0 is the empty one
+        :param colors: rgb tuple of every state
+        :param priority: states from the lowest to the highest priority when cells are merged
+            for zoomed out views, by default empty, the other states from the last and the counted state
+        """
+        self.name = name
+        self.table = np.asarray(table, dtype=np.int8)
+        self.states = self.table.shape[0]
+        if self.table.shape != (self.states, COUNTS) or self.table.min() < 0 or self.table.max() >= self.states:
+            raise ValueError("rule table has to map every state and count to a state")
+        self.lookup = self.table.ravel()
+        self.counted = counted
+        self.names = names
+        self.colors = colors
+        if priority is None:
+            others = [state for state in range(self.states - 1, 0, -1) if state != counted]
+            priority = [0] + others + [counted]
+        self.priority = priority
+
+    def __repr__(self) -> str:
+        return "Rule({})".format(self.name)
+
+
+def _wireworld() -> Rule:
+    table = np.zeros((4, COUNTS), dtype=np.int8)
+    # head -> tail, tail -> conductor
+    table[1] = 2
+    table[2] = 3
+    # conductor -> head with one or two head neighbours
+    table[3] = 3
+    table[3, 1:3] = 1
+    return Rule("WireWorld", table, 1, ["Empty", "Electron Head", "Electron Tail", "Conductor"],
+                [(0, 0, 0), (0, 0, 255), (255, 0, 0), (255, 255, 0)])
+
+
+def generations(name: str, birth: list, survival: list, states: int) -> Rule:
+    """
+        generations builds a Life-like rule with decaying states.
+        A cell is born from empty with a number of live neighbours in birth and stays alive
+        with a number in survival. A live cell which does not survive goes through the
+        decaying states 2 to states - 1 before becoming empty. With 2 states it is a Life-like rule.
+    """
+    table = np.zeros((states, COUNTS), dtype=np.int8)
+    table[0, birth] = 1
+    table[1] = 2 % states
+    table[1, survival] = 1
+    for state in range(2, states):
+        table[state] = (state + 1) % states
+    colors = [(0, 0, 0), (255, 255, 255)]
+    names = ["Dead", "Alive"]
+    for state in range(2, states):
+        shade = 255 - 200 * (state - 1) // (states - 1)
+        colors.append((0, 0, shade))
+        names.append("Dying {}".format(state - 1))
+    return Rule(name, table, 1, names, colors)
+
+
+def parse_rule(text: str) -> Rule:
+    """
+        parse_rule reads Life-like rules in the B/S notation, like B3/S23 for the Game of Life,
+        and Generations rules with a number of states, like B2/S/C3 for Brian's Brain
+    """
+    match = re.fullmatch(r"B([0-8]*)/S([0-8]*)(?:/C(\d+))?", text.strip().upper())
+    if match is None:
+        raise ValueError("{} is not a rule in the B/S or B/S/C notation".format(text))
+    birth, survival, states = match.groups()
+    states = int(states) if states else 2
+    if states < 2:
+        raise ValueError("a rule needs at least 2 states, got {}".format(states))
+    if states > MAX_STATES:
+        raise ValueError("a rule can have at most {} states, got {}".format(MAX_STATES, states))
+    return generations(text, [int(count) for count in birth], [int(count) for count in survival], states)
+
+
+WIREWORLD = _wireworld()
+BRIANS_BRAIN = generations("Brian's Brain", [2], [], 3)
+LIFE = generations("Life", [3], [2, 3], 2)
+
+# built in rules by name
+RULES = {"wireworld": WIREWORLD, "brians-brain": BRIANS_BRAIN, "life": LIFE}
+
+
+def get_rule(name: str) -> Rule:
+    """
+        get_rule returns built in rule by name, other names are parsed with parse_rule
+    """
+    if name.lower() in RULES:
+        return RULES[name.lower()]
+    return parse_rule(name)
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from game import Game
+
+
+class SimulationThread(threading.Thread):
+    """
+        SimulationThread advances the game in the background at its own rate.
+        Every access to the game from other threads has to hold lock. Readers
+        just look at the latest finished generation, generations they do not
+        look at are simply never shown.
+    """
+
+    def __init__(self, game: Game, lock, rate: float = 0, history=None):
+        """
+        :param game: game to advance
+        :param lock: lock guarding the game
+        :param rate: generations per second, 0 for as fast as possible
+        :param history: history.History saving checkpoints of the generations, None for no history
+        """
+        super().__init__(daemon=True)
+        self.game = game
+        self.lock = lock
+        self.rate = rate
+        self.history = history
+        self.stopped = threading.Event()
+
+    def set_rate(self, rate: float) -> None:
+        """
+            set_rate changes the number of generations per second, 0 for as fast as possible
+        """
+        self.rate = rate
+
+    def run(self) -> None:
+        deadline = time.perf_counter()
+        while not self.stopped.is_set():
+            with self.lock:
+                if self.history is not None:
+                    self.history.save_generation()
+                self.game.next()
+            if self.rate > 0:
+                deadline = max(deadline + 1 / self.rate, time.perf_counter() - 1)
+                self.stopped.wait(max(0.0, deadline - time.perf_counter()))
+            else:
+                deadline = time.perf_counter()
+                # gives other threads a chance to take the lock
+                time.sleep(0)
+
+    def stop(self) -> None:
+        """
+            stop finishes the thread after the current generation and waits for it
+        """
+        self.stopped.set()
+        self.join()
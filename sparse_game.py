@@ -0,0 +1,241 @@
+import numpy as np
+
+import board_format
+import neighbourhood
+from game import Game, WireWorld, EMPTY, ELECTRON_HEAD, ELECTRON_TAIL, CONDUCTOR
+
+
+def compile_cells(keys: np.ndarray, width: int, height: int) -> tuple:
+    """
+        compile_cells builds CSR style adjacency between wire cells
+    :param keys: sorted flat (row-major) indices of the wire cells
+    :param width: width of the board
+    :param height: height of the board
+    :return: tuple of (indptr, indices), neighbours of cell i are indices[indptr[i]:indptr[i + 1]]
+    """
+    ys, xs = np.divmod(keys, width)
+    rows = []
+    cols = []
+    for dy, dx in neighbourhood.MOORE_OFFSETS:
+        ny, nx = ys + dy, xs + dx
+        inside = (ny >= 0) & (ny < height) & (nx >= 0) & (nx < width)
+        candidates = np.flatnonzero(inside)
+        neighbour_keys = ny[candidates] * width + nx[candidates]
+        positions = np.searchsorted(keys, neighbour_keys)
+        positions[positions == len(keys)] = 0
+        found = keys[positions] == neighbour_keys if len(keys) else np.zeros(0, dtype=bool)
+        rows.append(candidates[found])
+        cols.append(positions[found])
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(keys)), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32)
+
+
+class SparseWireWorld(Game):
+    """
+        SparseWireWorld keeps only the wire (non-empty) cells of the board.
+        The board is compiled into a flat list of wire cells with a precomputed
+        neighbour table, so memory and step time scale with the amount of wire
+        instead of the area of the board.
+    """
+
+    def __init__(self, board: np.ndarray = None):
+        super().__init__()
+        if board is None:
+            board = WireWorld().get_board(0, 0)
+        self.compile(board)
+
+    def compile(self, board: np.ndarray) -> None:
+        """
+            compile converts dense board into the sparse representation
+        :param board: dense board to compile
+        """
+        self.height, self.width = board.shape
+        self.dtype = board.dtype
+        self.keys = np.flatnonzero(board)
+        self.state = board.ravel()[self.keys].astype(np.int8)
+        self.indptr, self.indices = compile_cells(self.keys, self.width, self.height)
+
+    def _recompile(self, keys: np.ndarray, state: np.ndarray) -> None:
+        self.keys = keys
+        self.state = state
+        self.indptr, self.indices = compile_cells(self.keys, self.width, self.height)
+
+    def checkpoint(self):
+        """
+            checkpoint returns the current board and generation to be given to restore later,
+            only the states are copied, the wire cells and their neighbour table are never changed in place
+        """
+        return self.keys, self.state.copy(), self.indptr, self.indices, self.width, self.height, self.generation
+
+    def restore(self, checkpoint) -> None:
+        """
+            restore brings back the board and generation of a checkpoint, which can be restored again later
+        :param checkpoint: value returned by checkpoint
+        """
+        self.keys, state, self.indptr, self.indices, self.width, self.height, self.generation = checkpoint
+        self.state = state.copy()
+
+    def add(self, x: int, y: int) -> None:
+        """
+            Add updates board by iterating to next value of state
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        """
+        value = self.get_board(x, y, 1, 1)[0, 0]
+        self.set(x, y, (value - 1) % 4)
+
+    def set(self, x: int, y: int, v: int) -> None:
+        """
+            Set updates the board position x, y with value v
+        :param x: horizontal coordinate of the board
+        :param y: vertical coordinate of the board
+        :param v: value to put in place
+        """
+        self._check_cells(x, y)
+        key = y * self.width + x
+        position = np.searchsorted(self.keys, key)
+        exists = position < len(self.keys) and self.keys[position] == key
+        if exists and v != EMPTY:
+            # wiring stays the same, only the state changes
+            self.state[position] = v
+        elif exists:
+            self._recompile(np.delete(self.keys, position), np.delete(self.state, position))
+        elif v != EMPTY:
+            self._recompile(np.insert(self.keys, position, key), np.insert(self.state, position, v))
+
+    def set_cells(self, xs, ys, values) -> None:
+        """
+            set_cells updates many board positions at once, a later cell wins over an earlier one at the same position.
+            The neighbour table is compiled once for all the cells.
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        :param values: value for every cell, or one value for all of them
+        """
+        xs, ys, values = (np.ravel(a) for a in np.broadcast_arrays(xs, ys, values))
+        self._check_cells(xs, ys)
+        keys = ys * self.width + xs
+        # the last value of every edited cell
+        keys, last = np.unique(keys[::-1], return_index=True)
+        values = values[::-1][last]
+        kept = ~np.isin(self.keys, keys)
+        placed = values != EMPTY
+        merged = np.concatenate([self.keys[kept], keys[placed]])
+        order = np.argsort(merged, kind="stable")
+        state = np.concatenate([self.state[kept], values[placed].astype(np.int8)])
+        self._recompile(merged[order], state[order])
+
+    def next(self) -> None:
+        """
+            Next updates the game to the new state
+        """
+        heads = self.state == ELECTRON_HEAD
+        # number of head neighbours of every cell from prefix sums over the neighbour table
+        prefix = np.zeros(len(self.indices) + 1, dtype=np.int32)
+        np.cumsum(heads[self.indices], out=prefix[1:])
+        counts = prefix[self.indptr[1:]] - prefix[self.indptr[:-1]]
+
+        new_state = np.full_like(self.state, CONDUCTOR)
+        conductors = self.state == CONDUCTOR
+        new_state[conductors & (counts >= 1) & (counts <= 2)] = ELECTRON_HEAD
+        new_state[heads] = ELECTRON_TAIL
+        self.state = new_state
+        self.generation += 1
+
+    def get_board(self, x: int, y: int, width: int = -1, height: int = -1, pad: bool = False) -> np.ndarray:
+        """
+            get_board returns part of the board as numpy.ndarray
+        :param x: horizontal element of the top left element to return
+        :param y: vertical element of the top left element to return
+        :param width: width of the returned board
+        :param height: height of the returned board
+        :param pad: whether the resulting array should be padded
+        :return:
+        """
+        if width == -1:
+            width = self.width
+        if height == -1:
+            height = self.height
+        if not pad:
+            width = max(0, min(width, self.width - x))
+            height = max(0, min(height, self.height - y))
+        board = np.zeros((height, width), dtype=self.dtype)
+
+        # keys are sorted row by row, so the rows of the window are one contiguous range
+        first_row, last_row = max(y, 0), min(y + height, self.height)
+        if first_row >= last_row:
+            return board
+        lo, hi = np.searchsorted(self.keys, [first_row * self.width, last_row * self.width])
+        ys, xs = np.divmod(self.keys[lo:hi], self.width)
+        inside = (xs >= x) & (xs < x + width)
+        board[ys[inside] - y, xs[inside] - x] = self.state[lo:hi][inside]
+        return board
+
+    def count_cells(self) -> np.ndarray:
+        """
+            count_cells returns the number of cells in every state, indexed by the state
+        """
+        counts = np.bincount(self.state.astype(np.intp), minlength=4)[:4]
+        counts[EMPTY] = self.width * self.height - len(self.keys)
+        return counts
+
+    def probe_states(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+            probe_states returns the states of the cells at given coordinates
+        :param xs: horizontal coordinates of the cells
+        :param ys: vertical coordinates of the cells
+        """
+        states = np.zeros(len(xs), dtype=np.int8)
+        if len(self.keys) == 0:
+            return states
+        # cells outside of the board are empty, their keys would wrap into the next row
+        keys = np.where(self._inside(xs, ys), ys * self.width + xs, -1)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[positions] == keys
+        states[found] = self.state[positions[found]]
+        return states
+
+    def expand_board(self, x1: int, x2: int, y1: int, y2: int) -> None:
+        """
+            expand_board expands the board in 4 direction
+        :param x1: expansion to the left
+        :param x2: expansion to the right
+        :param y1: expansion to the top
+        :param y2: expansion to the bottom
+        """
+        ys, xs = np.divmod(self.keys, self.width)
+        self.width += x1 + x2
+        self.height += y1 + y2
+        # shifting keeps the row-major order of cells, so the neighbour table stays valid
+        self.keys = (ys + y1) * self.width + xs + x1
+
+    @staticmethod
+    def get_color_dict() -> dict:
+        return WireWorld.get_color_dict()
+
+    @staticmethod
+    def color_table() -> list:
+        return WireWorld.color_table()
+
+    @staticmethod
+    def possible_values() -> list:
+        return WireWorld.possible_values()
+
+    @staticmethod
+    def state_names() -> list:
+        return WireWorld.state_names()
+
+    def get_board_size(self) -> tuple:
+        return self.width, self.height
+
+    def load_board(self, filename: str):
+        self.compile(board_format.load_board(filename))
+
+    def save_board(self, filename: str):
+        board_format.save_board(filename, board_format.GameView(self))
+
+    def reset_board(self):
+        self._recompile(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8))
@@ -0,0 +1,72 @@
+import numpy as np
+
+import editing
+from game import EMPTY, ELECTRON_HEAD, ELECTRON_TAIL, CONDUCTOR
+
+# characters of the stamp drawings
+CELLS = {".": EMPTY, "H": ELECTRON_HEAD, "T": ELECTRON_TAIL, "C": CONDUCTOR}
+
+
+def parse_stamp(drawing: str) -> np.ndarray:
+    """
+        parse_stamp converts a drawing with one character per cell into a board,
+        . is empty, H an electron head, T an electron tail and C a conductor
+    """
+    rows = drawing.strip().splitlines()
+    width = max(len(row.strip()) for row in rows)
+    board = np.zeros((len(rows), width), dtype=np.int8)
+    for y, row in enumerate(rows):
+        for x, cell in enumerate(row.strip()):
+            board[y, x] = CELLS[cell]
+    return board
+
+
+# components from examples/split_diodes_or_xor.npy, signals enter on the left and leave on the right
+STAMPS = {
+    # one input on the left of the middle row, two outputs on the top and bottom rows
+    "split": parse_stamp("""
+        .CCCCC
+        C.....
+        .CCCCC
+    """),
+    # lets electrons pass from left to right only
+    "diode": parse_stamp("""
+        .CC....
+        CC.CCCC
+        .CC....
+    """),
+    # blocks electrons coming from the left, lets them pass from right to left
+    "reverse_diode": parse_stamp("""
+        .CC....
+        C.CCCCC
+        .CC....
+    """),
+    # inputs on the top and bottom left corners, output on the right of the middle row
+    "or": parse_stamp("""
+        C......
+        .C.....
+        CCCCCCC
+        .C.....
+        C......
+    """),
+    # inputs on the left of the top and bottom rows, output on the right of the fourth row
+    "xor": parse_stamp("""
+        CCC......
+        ...C.....
+        ..CCCC...
+        ..C..CCCC
+        ..CCCC...
+        ...C.....
+        CCC......
+    """),
+}
+
+
+def get_stamp(name: str, turns: int = 0, flip: bool = False) -> np.ndarray:
+    """
+        get_stamp returns a component from STAMPS ready to be pasted with Game.paste
+    :param name: name of the component
+    :param turns: number of quarter turns clockwise
+    :param flip: whether the component is mirrored left to right before turning
+    """
+    return editing.transform(STAMPS[name], turns, flip).copy()
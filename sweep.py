@@ -0,0 +1,191 @@
+import argparse
+import itertools
+import json
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+
+import board_format
+import cycles
+from engines import ENGINES, make_game
+from game import ELECTRON_HEAD
+from headless import parse_probe
+from probes import PENDING, ProbeTrace
+
+
+def apply_pattern(board: np.ndarray, pattern: list) -> None:
+    """
+        apply_pattern writes the cells of pattern into board
+    :param board: board or batch of boards, the last two axes are the board
+    :param pattern: list of (x, y, value) cells
+    """
+    for x, y, value in pattern:
+        board[..., y, x] = value
+
+
+def input_combinations(inputs: dict) -> list:
+    """
+        input_combinations builds one pattern for every combination of inputs,
+        an input is switched on by putting an electron head on its cell
+    :param inputs: (x, y) position of every input by its name
+    :return: list of (name, pattern) tuples, the name lists the inputs that are on
+    """
+    names = list(inputs)
+    variants = []
+    for switched in itertools.product((False, True), repeat=len(names)):
+        on = [name for name, value in zip(names, switched) if value]
+        pattern = [(inputs[name][0], inputs[name][1], ELECTRON_HEAD) for name in on]
+        variants.append(("+".join(on) or "none", pattern))
+    return variants
+
+
+def run_variant(board: np.ndarray, pattern: list, generations: int, probes: dict, engine: str) -> dict:
+    """
+        run_variant simulates one variant of the board
+    :param board: base board
+    :param pattern: list of (x, y, value) cells written into the base board
+    :param generations: number of generations to run
+    :param probes: (x, y) position of every probe by its name
+    :param engine: name of the engine from ENGINES
+    :return: hash of the final board and generations with a head on every probe
+    """
+    board = board.copy()
+    apply_pattern(board, pattern)
+    game = make_game(engine, board)
+    trace = ProbeTrace(probes)
+    game.attach_probes(trace)
+    game.advance(generations)
+    result = {
+        "hash": cycles.board_hash(np.asarray(game.get_board(0, 0))),
+        "heads": {name: events for name, events in zip(trace.names, trace.events)},
+    }
+    if hasattr(game, "close"):
+        game.close()
+    return result
+
+
+def sweep(board: np.ndarray, variants: list, generations: int, probes: dict = None, engine: str = "wireworld",
+          jobs: int = 0) -> list:
+    """
+        sweep runs every variant as a separate simulation on a pool of worker processes
+    :param board: base board
+    :param variants: list of (name, pattern) tuples
+    :param generations: number of generations to run
+    :param probes: (x, y) position of every probe by its name
+    :param engine: name of the engine from ENGINES
+    :param jobs: number of worker processes, 0 for all cores
+    :return: list of results of run_variant with the name of the variant
+    """
+    tasks = [(board, pattern, generations, probes or {}, engine) for _, pattern in variants]
+    if jobs == 1 or len(tasks) == 1:
+        results = [run_variant(*task) for task in tasks]
+    else:
+        with Pool(jobs or None) as pool:
+            results = pool.starmap(run_variant, tasks)
+    return [dict(name=name, **result) for (name, _), result in zip(variants, results)]
+
+
+def sweep_batch(board: np.ndarray, variants: list, generations: int, probes: dict = None) -> list:
+    """
+        sweep_batch stacks all variants into one 3-D array and steps them together,
+        every generation is one pass of the compiled kernel of jit_game over the batch,
+        or a single vectorized update of the whole batch without numba
+    :param board: base board
+    :param variants: list of (name, pattern) tuples
+    :param generations: number of generations to run
+    :param probes: (x, y) position of every probe by its name
+    :return: list of results in the same form as sweep
+    """
+    # the compiled kernel when numba is installed, imported here to keep it out of the start of the other modes
+    from jit_game import step
+    probes = probes or {}
+    names = list(probes)
+    full = np.repeat(board[np.newaxis].astype(np.int8), len(variants), axis=0)
+    for i, (_, pattern) in enumerate(variants):
+        apply_pattern(full[i], pattern)
+    # only the part of the boards with wires is stepped, the rest stays empty
+    occupied = full.any(axis=0)
+    rows, columns = np.flatnonzero(occupied.any(axis=1)), np.flatnonzero(occupied.any(axis=0))
+    y1, y2 = (rows[0], rows[-1] + 1) if len(rows) else (0, 0)
+    x1, x2 = (columns[0], columns[-1] + 1) if len(columns) else (0, 0)
+    batch = full[:, y1:y2, x1:x2].copy()
+    spare = np.zeros_like(batch)
+    # probes outside of the wires never see a head
+    xs = np.array([probes[name][0] for name in names], dtype=np.int64) - x1
+    ys = np.array([probes[name][1] for name in names], dtype=np.int64) - y1
+    inside = np.flatnonzero((xs >= 0) & (xs < x2 - x1) & (ys >= 0) & (ys < y2 - y1))
+    xs, ys = xs[inside], ys[inside]
+
+    heads = [[[] for _ in names] for _ in variants]
+    pending = np.zeros((PENDING, len(variants), len(inside)), dtype=np.int8)
+    filled = 0
+    first = 0
+
+    def flush():
+        samples, variant, probe = np.nonzero(pending[:filled] == ELECTRON_HEAD)
+        for s, v, p in zip(samples.tolist(), variant.tolist(), inside[probe].tolist()):
+            heads[v][p].append(first + s)
+
+    for generation in range(generations + 1):
+        if generation:
+            step(batch, out=spare)
+            batch, spare = spare, batch
+        if filled == PENDING:
+            flush()
+            first, filled = generation, 0
+        pending[filled] = batch[:, ys, xs]
+        filled += 1
+    flush()
+
+    full[:, y1:y2, x1:x2] = batch
+    return [
+        {"name": name, "hash": cycles.board_hash(full[i]), "heads": dict(zip(names, heads[i]))}
+        for i, (name, _) in enumerate(variants)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a WireWorld board once for every input pattern")
+    parser.add_argument("board", help="base board file")
+    parser.add_argument("-n", "--generations", type=int, required=True, help="generations to run every variant")
+    parser.add_argument("--patterns", help="JSON file with a list of {\"name\": ..., \"cells\": [[x, y, value], ...]}")
+    parser.add_argument("--input", type=parse_probe, action="append", default=[], metavar="NAME=X,Y",
+                        help="input cell, every combination of inputs is run when no patterns are given")
+    parser.add_argument("--probe", type=parse_probe, action="append", default=[], metavar="NAME=X,Y",
+                        help="record generations with an electron head on cell X,Y")
+    parser.add_argument("--batch", action="store_true", help="step all variants together as one 3-D array")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="wireworld", help="engine of the worker runs")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="worker processes, 0 for all cores")
+    parser.add_argument("-o", "--output", help="JSON file for the results, printed when not given")
+    args = parser.parse_args(argv)
+
+    if args.patterns:
+        with open(args.patterns) as file:
+            variants = [(variant["name"], [tuple(cell) for cell in variant["cells"]]) for variant in json.load(file)]
+    elif args.input:
+        variants = input_combinations(dict(args.input))
+    else:
+        parser.error("either --patterns or --input is needed")
+
+    board = board_format.load_board(args.board)
+    probes = dict(args.probe)
+    if args.batch:
+        results = sweep_batch(board, variants, args.generations, probes)
+    else:
+        results = sweep(board, variants, args.generations, probes, args.engine, args.jobs)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        for result in results:
+            line = "{}: hash {:016x}".format(result["name"], result["hash"])
+            for name, events in result["heads"].items():
+                line += ", {} {}".format(name, len(events))
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
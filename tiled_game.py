@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from game import WireWorld, step
+
+
+class TiledWireWorld(WireWorld):
+    """
+        TiledWireWorld splits the board into tiles with a one cell halo and steps
+        them at the same time on a pool of worker threads.
+        The threads read the current board and write into a shared output board,
+        so no tile is copied between workers. NumPy releases the GIL inside its
+        array kernels, which lets the tiles run on separate cores.
+    """
+
+    def __init__(self, board: np.ndarray = None, workers: int = None, tile_height: int = None, tile_width: int = None):
+        """
+        :param board: initial board
+        :param workers: number of worker threads, defaults to the number of cores
+        :param tile_height: height of a tile, by default the board is split into one band per worker
+        :param tile_width: width of a tile, by default tiles span the whole width of the board
+        """
+        super().__init__(board)
+        self.workers = workers or os.cpu_count() or 1
+        self.tile_height = tile_height
+        self.tile_width = tile_width
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def tiles(self) -> list:
+        """
+            tiles splits the part of the board containing wires into tiles
+        :return: list of (y1, y2, x1, x2) bounds of the tiles in the stored board
+        """
+        self._prepare_step()
+        top, bottom, left, right = self.wire_box
+        tile_height = self.tile_height or max(1, -(-(bottom - top) // self.workers))
+        tile_width = self.tile_width or max(1, right - left)
+        return [
+            (y, min(y + tile_height, bottom), x, min(x + tile_width, right))
+            for y in range(top, bottom, tile_height) for x in range(left, right, tile_width)
+        ]
+
+    def _step_tile(self, bounds: tuple) -> None:
+        y1, y2, x1, x2 = bounds
+        # one cell of halo around the tile, clipped at the board edges
+        hy, hx = max(y1 - 1, 0), max(x1 - 1, 0)
+        stepped = step(self.board[hy:y2 + 1, hx:x2 + 1])
+        self.spare[y1:y2, x1:x2] = stepped[y1 - hy:y2 - hy, x1 - hx:x2 - hx]
+
+    def _step(self) -> None:
+        """
+            _step moves the game one generation forward, tiles are written into the spare buffer
+        """
+        # list() waits for all the tiles and re-raises errors from the workers
+        list(self.pool.map(self._step_tile, self.tiles()))
+        self.board, self.spare = self.spare, self.board
+        self.generation += 1
+
+    def close(self) -> None:
+        """
+            close shuts down the worker pool
+        """
+        self.pool.shutdown()